@@ -0,0 +1,104 @@
+"""Build the static frontend: content-hashed asset names and precompressed copies.
+
+    python -m app.build_frontend                       # app/frontend -> app/frontend_build
+    python -m app.build_frontend --src DIR --out DIR
+
+Assets (CSS, JS, images) are copied as name.<hash>.ext and HTML references to
+them are rewritten, so they can be cached as immutable; HTML pages keep their
+names. Every text file also gets .gz and, with the brotli package installed,
+.br variants (kept only when smaller), which PrecompressedStaticFiles serves
+by Accept-Encoding. The app serves the build when it exists.
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import shutil
+import sys
+
+from app.config import FRONTEND_BUILD_DIR, FRONTEND_SOURCE_DIR
+from app.utils.static import hashed_name
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz variants are built
+    brotli = None
+
+COMPRESSIBLE = (".html", ".css", ".js", ".svg", ".json", ".txt")
+# a variant must save at least this fraction of the file to be worth serving
+MIN_SAVING = 0.1
+
+
+def _compress(path: str) -> dict:
+    with open(path, "rb") as f:
+        data = f.read()
+    sizes = {"identity": len(data)}
+    variants = [("gzip", ".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ("br", ".br", lambda d: brotli.compress(d, quality=11)))
+    for coding, ext, compress in variants:
+        packed = compress(data)
+        if len(packed) <= len(data) * (1 - MIN_SAVING):
+            with open(path + ext, "wb") as f:
+                f.write(packed)
+            sizes[coding] = len(packed)
+    return sizes
+
+
+def build(src: str, out: str) -> dict:
+    """Write the build of ``src`` to ``out`` (replaced); returns {file: {encoding: bytes}}."""
+    if os.path.isdir(out):
+        shutil.rmtree(out)
+    os.makedirs(out)
+    names = sorted(n for n in os.listdir(src) if os.path.isfile(os.path.join(src, n)))
+
+    manifest = {}
+    for name in names:
+        if name.endswith(".html"):
+            continue
+        with open(os.path.join(src, name), "rb") as f:
+            content = f.read()
+        manifest[name] = hashed_name(name, content)
+        with open(os.path.join(out, manifest[name]), "wb") as f:
+            f.write(content)
+
+    # src="/shared.js", href="/style.css", ...
+    refs = re.compile(r'((?:src|href)=")/(' + "|".join(map(re.escape, manifest)) + r')"') if manifest else None
+    for name in names:
+        if not name.endswith(".html"):
+            continue
+        with open(os.path.join(src, name), encoding="utf-8") as f:
+            html = f.read()
+        if refs:
+            html = refs.sub(lambda m: f'{m.group(1)}/{manifest[m.group(2)]}"', html)
+        with open(os.path.join(out, name), "w", encoding="utf-8") as f:
+            f.write(html)
+
+    with open(os.path.join(out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    report = {}
+    for name in sorted(os.listdir(out)):
+        if name.endswith(COMPRESSIBLE) and name != "manifest.json":
+            report[name] = _compress(os.path.join(out, name))
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.build_frontend", description=__doc__.splitlines()[0])
+    parser.add_argument("--src", default=FRONTEND_SOURCE_DIR)
+    parser.add_argument("--out", default=FRONTEND_BUILD_DIR)
+    args = parser.parse_args(argv)
+
+    report = build(args.src, args.out)
+    print(f"{'file':32} {'bytes':>7} {'gzip':>7} {'br':>7}")
+    for name, sizes in report.items():
+        print(f"{name:32} {sizes['identity']:7} {sizes.get('gzip', '-'):>7} {sizes.get('br', '-'):>7}")
+    if brotli is None:
+        print("brotli not installed: built gzip variants only")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+import asyncio
+import hashlib
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+from app.config import CACHE_BACKEND, CACHE_URL, CACHE_MAX_BYTES, CACHE_TTL_SECONDS
+from app.config import DATABASE_REPLICA_URLS, READ_YOUR_WRITES_SECONDS, WEB_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+class CacheError(Exception):
+    """A cache backend failed; callers treat it as a miss."""
+
+
+class MemoryCache:
+    """In-process LRU of bytes values, bounded by total size and per-key TTL.
+
+    Only visible to one worker process, so the app refuses it when
+    WEB_CONCURRENCY > 1; use RedisCache when several workers must see each
+    other's invalidations.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        with self._lock:
+            if nx and key in self._entries:
+                return False
+            if key in self._entries:
+                self._drop(key)
+            expires_at = time.monotonic() + ttl if ttl else None
+            self._entries[key] = (expires_at, value)
+            self.bytes += len(key) + len(value)
+            while self.bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+            return True
+
+    def _drop(self, key: str):
+        _, value = self._entries.pop(key)
+        self.bytes -= len(key) + len(value)
+
+    async def memory_stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+
+class RedisCache:
+    """Minimal asyncio client for any Redis-protocol (RESP2) server: GET, SET, INFO.
+
+    Keeps a small pool of connections per event loop; connection or protocol
+    failures raise CacheError and drop the connection.
+    """
+
+    def __init__(self, url: str, pool_size: int = 8, timeout: float = 0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle = []
+        self._loop = None
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        conn = (reader, writer)
+        if self.password:
+            await self._roundtrip(conn, "AUTH", self.password)
+        if self.db:
+            await self._roundtrip(conn, "SELECT", self.db)
+        return conn
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    @classmethod
+    async def _read_reply(cls, reader):
+        line = await reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise CacheError("connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            raise CacheError(rest.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            data = await reader.readexactly(n + 2)
+            return data[:-2]
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [await cls._read_reply(reader) for _ in range(n)]
+        raise CacheError(f"unexpected reply {line!r}")
+
+    async def _roundtrip(self, conn, *args):
+        reader, writer = conn
+        writer.write(self._encode(args))
+        await writer.drain()
+        return await self._read_reply(reader)
+
+    async def execute(self, *args):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # connections belong to the loop that opened them
+            self._idle, self._loop = [], loop
+        conn = None
+        try:
+            conn = self._idle.pop() if self._idle else await asyncio.wait_for(self._connect(), self.timeout)
+            reply = await asyncio.wait_for(self._roundtrip(conn, *args), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, CacheError) as e:
+            if conn is not None:
+                conn[1].close()
+            raise CacheError(str(e) or type(e).__name__) from e
+        if len(self._idle) < self.pool_size:
+            self._idle.append(conn)
+        else:
+            conn[1].close()
+        return reply
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        args = ["SET", key, value]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        if nx:
+            args.append("NX")
+        return await self.execute(*args) is not None
+
+    async def memory_stats(self) -> dict:
+        info = (await self.execute("INFO", "memory") or b"").decode("utf-8", "replace")
+        fields = dict(line.split(":", 1) for line in info.splitlines() if ":" in line)
+        return {"used_memory": int(fields.get("used_memory", 0))}
+
+
+class ResponseCache:
+    """Serialized /tasks listing responses keyed by (user, generation, query params).
+
+    Every user has a random generation token that is part of each key; task
+    writes replace it, which makes all of that user's cached listings
+    unreachable at once (they then age out by TTL/LRU). A random token rather
+    than a counter keeps this safe even if the backend evicts the generation.
+    Backend errors are logged and treated as misses.
+    """
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _failed(self, action: str, e: Exception):
+        self.errors += 1
+        logger.warning("response cache %s failed: %s", action, e)
+
+    async def lookup(self, user: str, params) -> Tuple[Optional[str], Optional[Tuple[str, bytes]]]:
+        """Return (key, (etag, body) or None). key is None when caching is off or failing."""
+        if self.backend is None:
+            return None, None
+        gen_key = f"tm:gen:{user}"
+        try:
+            gen = await self.backend.get(gen_key)
+            if gen is None:
+                await self.backend.set(gen_key, secrets.token_hex(8).encode(), nx=True)
+                gen = await self.backend.get(gen_key)
+            digest = hashlib.sha1(repr(params).encode("utf-8")).hexdigest()
+            key = f"tm:tasks:{user}:{gen.decode()}:{digest}"
+            entry = await self.backend.get(key)
+        except CacheError as e:
+            self._failed("lookup", e)
+            return None, None
+        if entry is None:
+            self.misses += 1
+            return key, None
+        self.hits += 1
+        etag, _, body = entry.partition(b"\n")
+        return key, (etag.decode(), body)
+
+    async def store(self, key: Optional[str], etag: str, body: bytes):
+        if key is None:
+            return
+        try:
+            await self.backend.set(key, etag.encode() + b"\n" + body, ttl=self.ttl)
+        except CacheError as e:
+            self._failed("store", e)
+
+    async def invalidate(self, user: str):
+        """Drop every cached listing of ``user``; call after their write commits."""
+        if self.backend is None:
+            return
+        try:
+            await self.backend.set(f"tm:gen:{user}", secrets.token_hex(8).encode())
+        except CacheError as e:
+            # entries may be served until their TTL expires
+            self._failed("invalidate", e)
+
+    async def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+        if self.backend is not None:
+            try:
+                stats.update(await self.backend.memory_stats())
+            except CacheError as e:
+                self._failed("stats", e)
+        return stats
+
+
+class WriteMarks:
+    """Users who wrote within the last ``window`` seconds (read-your-writes).
+
+    With read replicas, such a user's reads go to the primary until the mark
+    expires, so they never see a listing from before their own write. Marks
+    must be seen by every worker (the next read may land on another one), so
+    they live in the redis response cache, or in memory with a single worker.
+    If the backend fails the user counts as a recent writer: the primary is
+    always safe to read from.
+    """
+
+    def __init__(self, backend, window: float, enabled: bool = True):
+        self.backend = backend
+        self.window = window
+        self.enabled = enabled and window > 0
+
+    async def mark(self, user: str):
+        if not self.enabled:
+            return
+        try:
+            await self.backend.set(f"tm:wrote:{user}", b"1", ttl=self.window)
+        except CacheError as e:
+            logger.warning("write mark failed: %s", e)
+
+    async def recent(self, user: str) -> bool:
+        if not self.enabled:
+            return False
+        try:
+            return await self.backend.get(f"tm:wrote:{user}") is not None
+        except CacheError as e:
+            logger.warning("write mark lookup failed: %s", e)
+            return True
+
+
+def _make_backend(name: str):
+    if name == "memory":
+        if WEB_CONCURRENCY > 1:
+            raise RuntimeError(
+                "CACHE_BACKEND=memory is per process; with WEB_CONCURRENCY > 1 use redis (CACHE_URL) or none"
+            )
+        return MemoryCache(CACHE_MAX_BYTES)
+    if name == "redis":
+        return RedisCache(CACHE_URL)
+    return None
+
+
+def _make_write_marks_backend(response_backend):
+    if isinstance(response_backend, RedisCache):
+        return response_backend
+    if WEB_CONCURRENCY > 1:
+        raise RuntimeError(
+            "read replicas with WEB_CONCURRENCY > 1 need CACHE_BACKEND=redis: "
+            "read-your-writes marks must be shared by every worker"
+        )
+    return response_backend or MemoryCache(CACHE_MAX_BYTES)
+
+
+response_cache = ResponseCache(_make_backend(CACHE_BACKEND), CACHE_TTL_SECONDS)
+# only needed when reads can go to a replica
+write_marks = WriteMarks(
+    _make_write_marks_backend(response_cache.backend) if DATABASE_REPLICA_URLS else None,
+    READ_YOUR_WRITES_SECONDS,
+    enabled=bool(DATABASE_REPLICA_URLS),
+)
@@ -6,3 +6,118 @@ ACCESS_TOKEN_EXPIRE_MINUTES = float(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES"
 
 # Default to local SQLite for dev/tests; override via env in Docker/Prod
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./taskmaster.db")
+
+# Async driver URL used by the API routes; derived from DATABASE_URL unless set
+# (sqlite -> sqlite+aiosqlite, postgresql -> postgresql+psycopg async; asyncpg also works)
+def _async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql+psycopg2:", "postgresql:", "postgres:"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg:" + url[len(prefix):]
+    return url
+
+ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+# Connection pool of each engine: persistent connections, extra ones allowed
+# under bursts, seconds to wait for a free one (then the request fails) and max
+# connection age in seconds (-1 = never recycle; helps behind proxies like PgBouncer/Neon)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", -1))
+
+# Optional read replicas: comma-separated URLs (same forms as DATABASE_URL).
+# Listings and exports read from them round-robin, except for a user who wrote
+# in the last READ_YOUR_WRITES_SECONDS, whose reads stay on the primary so they
+# see their own changes; keep it above the replicas' usual lag.
+DATABASE_REPLICA_URLS = [u.strip() for u in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("READ_YOUR_WRITES_SECONDS", 5))
+
+# bcrypt runs in a dedicated process pool; 0 workers = use a thread instead.
+# Requests beyond workers + queue size are rejected with 503 + Retry-After.
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", os.cpu_count() or 1))
+HASH_QUEUE_SIZE = int(os.environ.get("HASH_QUEUE_SIZE", 64))
+HASH_RETRY_AFTER_SECONDS = int(os.environ.get("HASH_RETRY_AFTER_SECONDS", 1))
+
+# Max verified JWTs kept in the in-process cache (0 disables it)
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 10000))
+
+# Long-lived refresh tokens (stored hashed server-side, revocable)
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+
+# Max items accepted by POST/DELETE /tasks/bulk in one request
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", 1000))
+
+# Rows fetched per round trip (and encoded per chunk) by GET /tasks/export
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 500))
+
+# POST /tasks/import: rows per INSERT batch/commit, and max row errors returned
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", 1000))
+IMPORT_MAX_ERRORS = int(os.environ.get("IMPORT_MAX_ERRORS", 100))
+# Longest line / multi-line CSV record accepted, in characters; bounds the
+# memory one request can hold while looking for the end of a record
+IMPORT_MAX_RECORD_SIZE = int(os.environ.get("IMPORT_MAX_RECORD_SIZE", 1024 * 1024))
+
+# Worker processes serving the app (uvicorn and gunicorn read it as their
+# default --workers); per-process state such as a "memory" cache is refused above 1.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+# Per-user cache of serialized GET /tasks responses: "redis" (any Redis-protocol
+# server at CACHE_URL, shared by workers), "memory" (per process: single worker
+# only, other workers would keep serving listings/ETags invalidated elsewhere)
+# or "none". Defaults to redis when CACHE_URL is set, otherwise none.
+# Task writes invalidate it; the TTL only bounds staleness if an invalidation fails.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "redis" if os.environ.get("CACHE_URL") else "none")
+CACHE_URL = os.environ.get("CACHE_URL", "redis://localhost:6379/0")
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_TTL_SECONDS = float(os.environ.get("CACHE_TTL_SECONDS", 300))
+
+# GET /tasks/events change feed (SSE): "memory" fans out within one process,
+# "redis" through pub/sub on EVENTS_URL so every worker sees every write; "none"
+# disables the endpoint. Each connection buffers at most EVENTS_QUEUE_SIZE events
+# (a slower client gets a "reset" and reloads); idle streams get a comment line
+# every EVENTS_KEEPALIVE_SECONDS so proxies keep them open.
+EVENTS_BACKEND = os.environ.get("EVENTS_BACKEND", "memory")
+EVENTS_URL = os.environ.get("EVENTS_URL", CACHE_URL)
+EVENTS_QUEUE_SIZE = int(os.environ.get("EVENTS_QUEUE_SIZE", 100))
+EVENTS_KEEPALIVE_SECONDS = float(os.environ.get("EVENTS_KEEPALIVE_SECONDS", 15))
+
+# SQL profiling: statements slower than this are logged ("app.sql" logger; 0 disables).
+# With QUERY_BUDGET_STRICT=1 (CI), a request exceeding its route's @query_budget
+# raises instead of only logging.
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 200))
+QUERY_BUDGET_STRICT = os.environ.get("QUERY_BUDGET_STRICT", "").lower() in ("1", "true", "yes")
+
+# GET /metrics (Prometheus): METRICS_ENABLED=0 removes the endpoint; with
+# METRICS_TOKEN set, scrapes must send "Authorization: Bearer <token>". Without
+# a token it is open, so only expose it on an internal network.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Production SQLite mode (opt-in; for deployments that serve from a local SQLite
+# file): WAL journal, synchronous=NORMAL, memory-mapped reads, a busy timeout and
+# one serialized writer per process. Keep it off on network filesystems (e.g. an
+# Azure Files mount), where WAL's shared memory does not work.
+SQLITE_PRODUCTION = os.environ.get("SQLITE_PRODUCTION", "").lower() in ("1", "true", "yes")
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+# Group commit for POST /tasks/ (opt-in): creations from concurrent requests are
+# queued for up to GROUP_COMMIT_WINDOW_MS (or until GROUP_COMMIT_MAX_BATCH are
+# waiting) and committed in one transaction; each response still waits for the
+# commit of its task. Trades a few ms of latency for far fewer fsyncs under spikes.
+TASK_GROUP_COMMIT = os.environ.get("TASK_GROUP_COMMIT", "").lower() in ("1", "true", "yes")
+GROUP_COMMIT_WINDOW_MS = float(os.environ.get("GROUP_COMMIT_WINDOW_MS", 5))
+GROUP_COMMIT_MAX_BATCH = int(os.environ.get("GROUP_COMMIT_MAX_BATCH", 256))
+
+# Static frontend: served from the content-hashed, precompressed build
+# (python -m app.build_frontend, run by the Dockerfile) when it exists, else
+# straight from the sources.
+FRONTEND_SOURCE_DIR = "app/frontend"
+FRONTEND_BUILD_DIR = os.environ.get("FRONTEND_BUILD_DIR", "app/frontend_build")
+# gzip for dynamic responses (e.g. /tasks pages) of at least COMPRESS_MIN_BYTES
+# (default: about one TCP segment; smaller bodies gain nothing on the wire)
+# when the client accepts it; 0 disables. Level 1-9: CPU per response vs. size.
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1400))
+COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 6))
@@ -1,24 +1,176 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import weakref
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.config import DATABASE_URL
+from sqlalchemy.util import await_only
+from app.config import DATABASE_URL, ASYNC_DATABASE_URL, DATABASE_REPLICA_URLS, SLOW_QUERY_MS, _async_url
+from app.config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+from app.config import SQLITE_PRODUCTION, SQLITE_MMAP_SIZE, SQLITE_BUSY_TIMEOUT_MS
+from app.utils.metrics import count_commits, instrument_pool, timed_pool
+from app.utils.profiling import instrument_engine
 
 # Only apply sqlite-specific connect_args when using sqlite
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 
 # Enable pool_pre_ping to avoid stale connections (useful for cloud DBs like Neon)
+pool_args = dict(
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+)
+# the queue pools SQLAlchemy picks for file SQLite and PostgreSQL, with their
+# checkouts timed into db_pool_checkout_wait_seconds
+
 engine = create_engine(
     DATABASE_URL,
     connect_args=connect_args,
-    pool_pre_ping=True,
+    poolclass=timed_pool(QueuePool, "sync"),
+    **pool_args,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API routes so requests wait on DB I/O without
+# holding a threadpool thread. The sync engine above stays for startup
+# schema work, tools and tests.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=timed_pool(AsyncAdaptedQueuePool, "async"), **pool_args)
+
+# Read replicas (DATABASE_REPLICA_URLS), only ever used for reads
+replica_engines = [
+    create_async_engine(_async_url(url), poolclass=timed_pool(AsyncAdaptedQueuePool, f"replica{i}"), **pool_args)
+    for i, url in enumerate(DATABASE_REPLICA_URLS)
+]
+
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    # pysqlite's implicit BEGIN takes the write lock lazily, so two concurrent
+    # writers can deadlock on the lock upgrade and one fails at once with
+    # "database is locked". Emit BEGIN ourselves so write sessions can take
+    # the lock up front with BEGIN IMMEDIATE.
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _sqlite_manual_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(async_engine.sync_engine, "begin")
+    def _sqlite_begin(conn):
+        mode = conn.get_execution_options().get("sqlite_begin", "DEFERRED")
+        if mode == "IMMEDIATE" and SQLITE_PRODUCTION:
+            # single writer: queue write transactions on the event loop instead
+            # of letting them spin in SQLite's busy handler; reads stay concurrent
+            await_only(_writer_lock().acquire())
+            conn.info["holds_writer_lock"] = True
+        try:
+            conn.exec_driver_sql("BEGIN " + mode)
+        except Exception:
+            _release_writer_lock(conn)
+            raise
+
+    # The engine's commit/rollback events fire before the DBAPI call, so a
+    # writer holding the lock ends its transaction right here and only then
+    # lets the next one in; pysqlite's commit()/rollback() after us are no-ops.
+    @event.listens_for(async_engine.sync_engine, "commit")
+    def _sqlite_commit(conn):
+        if conn.info.get("holds_writer_lock"):
+            _sqlite_end(conn, commit=True)
+
+    @event.listens_for(async_engine.sync_engine, "rollback")
+    def _sqlite_rollback(conn):
+        if conn.info.get("holds_writer_lock"):
+            _sqlite_end(conn, commit=False)
+
+    def _sqlite_end(conn, commit: bool):
+        try:
+            if conn.invalidated:
+                return  # the connection (and its transaction) is gone
+            dbapi_connection = conn.connection.dbapi_connection
+            if not commit:
+                dbapi_connection.rollback()
+                return
+            try:
+                dbapi_connection.commit()
+            except Exception:
+                # don't let the next writer in while this transaction may be open
+                dbapi_connection.rollback()
+                raise
+        finally:
+            _release_writer_lock(conn)
+
+    def _release_writer_lock(conn):
+        if conn.info.pop("holds_writer_lock", False):
+            _writer_lock().release()
+
+
+# one writer lock per event loop (asyncio locks are bound to their loop)
+_writer_locks = weakref.WeakKeyDictionary()
+
+def _writer_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _writer_locks.get(loop)
+    if lock is None:
+        lock = _writer_locks[loop] = asyncio.Lock()
+    return lock
+
+
+def _sqlite_production_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL: readers never block on the writer and commits append instead of
+    # rewriting pages; NORMAL sync is durable across app crashes under WAL
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+if SQLITE_PRODUCTION:
+    for _engine in (engine, async_engine.sync_engine):
+        if _engine.dialect.name == "sqlite":
+            event.listen(_engine, "connect", _sqlite_production_pragmas)
+
+instrument_pool(engine, "sync")
+instrument_pool(async_engine.sync_engine, "async")
+count_commits(async_engine.sync_engine, "async")
+for _i, _replica in enumerate(replica_engines):
+    instrument_pool(_replica.sync_engine, f"replica{_i}")
+# per-request query counts / Server-Timing and the slow-query log
+for _engine in (engine, async_engine.sync_engine, *(r.sync_engine for r in replica_engines)):
+    instrument_engine(_engine, SLOW_QUERY_MS)
+
+# expire_on_commit=False: returned ORM objects are serialized after commit
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncWriteSessionLocal = async_sessionmaker(
+    async_engine.execution_options(sqlite_begin="IMMEDIATE"), autoflush=False, expire_on_commit=False
+)
+
+ReplicaSessionLocals = [
+    async_sessionmaker(replica, autoflush=False, expire_on_commit=False) for replica in replica_engines
+]
+_next_replica = itertools.cycle(range(len(ReplicaSessionLocals)))
+
 Base = declarative_base()
 
+
+def read_sessionmaker(primary: bool = False):
+    """Session factory for a read-only unit of work: the next replica
+    (round-robin), or the primary when ``primary`` is set or none is configured.
+    """
+    if primary or not ReplicaSessionLocals:
+        return AsyncSessionLocal
+    return ReplicaSessionLocals[next(_next_replica)]
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_write_db():
+    """Session for routes that write (takes the SQLite write lock at BEGIN)."""
+    async with AsyncWriteSessionLocal() as db:
+        yield db
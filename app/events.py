@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set
+
+from app.cache import CacheError, RedisCache
+from app.config import EVENTS_BACKEND, EVENTS_URL, EVENTS_QUEUE_SIZE
+from app.utils.metrics import events_dropped_total
+from app.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# sent in place of whatever a subscriber missed: the client reloads its view
+RESET = dumps({"type": "reset"})
+
+
+class Subscription:
+    """One open change feed: a bounded queue of encoded events for one user.
+
+    A consumer that falls ``maxsize`` events behind loses its backlog, which is
+    replaced by a single RESET event, so a slow connection costs at most
+    ``maxsize`` events of memory and never blocks publishers.
+    """
+
+    def __init__(self, user: str, maxsize: int):
+        self.user = user
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, event: bytes):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            events_dropped_total.inc(amount=self.queue.qsize())
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Next event, or None if none arrived within ``timeout`` seconds."""
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class MemoryBroker:
+    """Delivers a user's events to their subscriptions in this process.
+
+    Only reaches clients connected to the same worker; use RedisBroker when
+    several workers serve the API.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, user: str) -> Subscription:
+        sub = Subscription(user, self.queue_size)
+        self._subscriptions.setdefault(user, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        subs = self._subscriptions.get(sub.user)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subscriptions[sub.user]
+
+    def deliver(self, user: str, payload: bytes):
+        """Queue the newline-separated events in ``payload`` for ``user``'s subscriptions."""
+        subs = tuple(self._subscriptions.get(user, ()))
+        if not subs:
+            return
+        events, loop = payload.split(b"\n"), _running_loop()
+        for sub in subs:
+            for event in events:
+                if sub.loop is loop:
+                    sub.put(event)
+                else:
+                    # subscription served by another event loop (thread)
+                    sub.loop.call_soon_threadsafe(sub.put, event)
+
+    def reset_all(self):
+        for user in tuple(self._subscriptions):
+            self.deliver(user, RESET)
+
+    async def publish(self, user: str, payload: bytes):
+        self.deliver(user, payload)
+
+    def stats(self) -> dict:
+        return {"subscribers": sum(len(subs) for subs in self._subscriptions.values())}
+
+
+class RedisBroker:
+    """Fans events out to every worker through Redis-protocol pub/sub.
+
+    PUBLISH goes through a RedisCache client; each process keeps one extra
+    connection PSUBSCRIBEd to all users' channels and hands messages to its
+    local subscriptions. Publish failures are logged (the events are lost);
+    after the subscriber connection drops, local subscriptions get RESET once
+    it is back, since events may have been missed in between.
+    """
+
+    CHANNEL = "tm:events:"
+
+    def __init__(self, url: str, queue_size: int, retry_seconds: float = 1.0):
+        self.client = RedisCache(url)
+        self.local = MemoryBroker(queue_size)
+        self.retry_seconds = retry_seconds
+        self._listener = None
+
+    def subscribe(self, user: str) -> Subscription:
+        listener = self._listener
+        if listener is None or listener.done() or listener.get_loop() is not _running_loop():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return self.local.subscribe(user)
+
+    def unsubscribe(self, sub: Subscription):
+        self.local.unsubscribe(sub)
+
+    async def publish(self, user: str, payload: bytes):
+        try:
+            await self.client.execute("PUBLISH", self.CHANNEL + user, payload)
+        except CacheError as e:
+            logger.warning("event publish failed: %s", e)
+
+    async def _listen(self):
+        missed = False
+        while True:
+            conn = None
+            try:
+                conn = await asyncio.wait_for(self.client._connect(), self.client.timeout)
+                await asyncio.wait_for(self.client._roundtrip(conn, "PSUBSCRIBE", self.CHANNEL + "*"), self.client.timeout)
+                if missed:
+                    self.local.reset_all()
+                while True:
+                    message = await RedisCache._read_reply(conn[0])
+                    # [b"pmessage", pattern, channel, data]
+                    if isinstance(message, list) and len(message) == 4 and message[0] == b"pmessage":
+                        user = message[2].decode("utf-8")[len(self.CHANNEL):]
+                        self.local.deliver(user, message[3])
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, CacheError) as e:
+                logger.warning("event subscriber connection failed: %s", e)
+            finally:
+                if conn is not None:
+                    conn[1].close()
+            missed = True
+            await asyncio.sleep(self.retry_seconds)
+
+    def stats(self) -> dict:
+        return self.local.stats()
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _make_broker(name: str):
+    if name == "redis":
+        return RedisBroker(EVENTS_URL, EVENTS_QUEUE_SIZE)
+    if name == "memory":
+        return MemoryBroker(EVENTS_QUEUE_SIZE)
+    return None
+
+
+broker = _make_broker(EVENTS_BACKEND)
+
+
+async def publish(user: str, events: List[dict]):
+    """Send ``events`` to the open change feeds of ``user``; call after the commit.
+
+    One broker message per call. More events than a connection can buffer are
+    sent as a single reset instead.
+    """
+    if broker is None or not events:
+        return
+    if len(events) >= EVENTS_QUEUE_SIZE:
+        await broker.publish(user, RESET)
+    else:
+        await broker.publish(user, b"\n".join(dumps(event) for event in events))
@@ -6,9 +6,39 @@ const $$ = (sel, root = document) => Array.from(root.querySelectorAll(sel))
 
 // Token utilities
 const TOKEN_KEY = 'taskmaster_token'
+const REFRESH_KEY = 'taskmaster_refresh_token'
 const getToken = () => localStorage.getItem(TOKEN_KEY)
-const setToken = (t) => localStorage.setItem(TOKEN_KEY, t)
-const clearToken = () => localStorage.removeItem(TOKEN_KEY)
+const setToken = (t, refresh) => {
+  localStorage.setItem(TOKEN_KEY, t)
+  if (refresh) localStorage.setItem(REFRESH_KEY, refresh)
+}
+const clearToken = () => {
+  localStorage.removeItem(TOKEN_KEY)
+  localStorage.removeItem(REFRESH_KEY)
+}
+
+// Renovar el access token con el refresh token (sin contraseña). Una sola petición en vuelo.
+let refreshing = null
+function refreshAccessToken () {
+  const refresh = localStorage.getItem(REFRESH_KEY)
+  if (!refresh) return Promise.resolve(false)
+  if (!refreshing) {
+    refreshing = fetch('/auth/refresh', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token: refresh })
+    })
+      .then(async res => {
+        if (!res.ok) return false
+        const j = await res.json()
+        setToken(j.token, j.refresh_token)
+        return true
+      })
+      .catch(() => false)
+      .finally(() => { refreshing = null })
+  }
+  return refreshing
+}
 
 // Toasts
 function ensureToastContainer () {
@@ -52,12 +82,15 @@ async function safeText (res) {
 }
 
 // API helpers
-async function apiFetch (path, opts = {}) {
+async function apiFetch (path, opts = {}, retried = false) {
   const headers = new Headers(opts.headers || {})
   headers.set('Content-Type', 'application/json')
   const token = getToken()
   if (token) headers.set('Authorization', `Bearer ${token}`)
   const res = await fetch(path, { ...opts, headers })
+  if (res.status === 401 && !retried && await refreshAccessToken()) {
+    return apiFetch(path, opts, true)
+  }
   if (res.status === 401) {
     showToast('Sesión expirada. Inicia sesión nuevamente.', 'error')
     clearToken()
@@ -77,7 +110,7 @@ const api = {
     if (!res.ok) throw new Error(await safeText(res))
     const j = await res.json()
     // Normalizar forma: devolver access_token
-    return { access_token: j.access_token || j.token, token_type: j.token_type || 'bearer' }
+    return { access_token: j.access_token || j.token, token_type: j.token_type || 'bearer', refresh_token: j.refresh_token }
   },
   register: async (email, password) => {
     const res = await fetch('/auth/register', {
@@ -88,9 +121,11 @@ const api = {
     if (!res.ok) throw new Error(await safeText(res))
     return res.json()
   },
-  getNotes: async ({ page = 1, limit = 10, q } = {}) => {
+  getNotes: async ({ page = 1, limit = 10, q, fields } = {}) => {
     const params = new URLSearchParams({ page, limit })
     if (q) params.set('q', q)
+    // e.g. 'id,title' to skip descriptions when only titles are shown
+    if (fields) params.set('fields', fields)
     const res = await apiFetch(`/tasks/?${params.toString()}`)
     if (!res.ok) throw new Error(await safeText(res))
     return res.json()
@@ -103,10 +138,49 @@ const api = {
     if (!res.ok) throw new Error(await safeText(res))
     return res.json()
   },
+  logout: async () => {
+    const refresh = localStorage.getItem(REFRESH_KEY)
+    if (refresh) {
+      await fetch('/auth/logout', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token: refresh })
+      }).catch(() => {})
+    }
+    clearToken()
+  },
   deleteNote: async (id) => {
     const res = await apiFetch(`/tasks/${id}`, { method: 'DELETE' })
     if (!res.ok) throw new Error(await safeText(res))
     return true
+  },
+  // Feed de cambios (SSE): onChange({ type: 'created'|'deleted'|'reset', task?, id? })
+  // por cada cambio de las notas del usuario, desde cualquier dispositivo.
+  // EventSource reconecta solo; si el servidor rechaza el stream (token
+  // caducado) se renueva el token una vez y se reabre. Devuelve una función para cerrarlo.
+  watchNotes: (onChange, { onOpen, onClose } = {}) => {
+    let es = null
+    let closed = false
+    let retried = false
+    const open = () => {
+      const token = getToken()
+      if (closed || !token) return
+      es = new EventSource(`/tasks/events?token=${encodeURIComponent(token)}`)
+      es.onopen = () => { retried = false; onOpen && onOpen() }
+      es.onmessage = (e) => {
+        try { onChange(JSON.parse(e.data)) } catch {}
+      }
+      es.onerror = async () => {
+        if (closed || es.readyState !== EventSource.CLOSED) return
+        onClose && onClose()
+        if (!retried && await refreshAccessToken()) {
+          retried = true
+          open()
+        }
+      }
+    }
+    open()
+    return () => { closed = true; es && es.close() }
   }
 }
 
@@ -1,34 +1,46 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import fastapi
-from fastapi.staticfiles import StaticFiles
-from app.database import Base, engine
-from sqlalchemy import inspect, text
-from app.routers import auth, tasks
+from starlette.middleware.gzip import GZipMiddleware
+from app.config import COMPRESS_LEVEL, COMPRESS_MIN_BYTES, FRONTEND_BUILD_DIR, FRONTEND_SOURCE_DIR, METRICS_ENABLED
+from app.routers import auth, tasks, metrics
+from app.utils.hash_pool import hash_pool
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import QueryProfilerMiddleware
+from app.utils.static import PrecompressedStaticFiles
 
-Base.metadata.create_all(bind=engine)
+# The schema is managed by versioned migrations (python -m app.migrate),
+# run once before deploy; startup does no DDL or introspection.
 
-# Ensure new columns exist without Alembic (simple additive migrations)
-def _ensure_schema():
-	try:
-		insp = inspect(engine)
-		cols = [c['name'] for c in insp.get_columns('tasks')]
-		if 'description' not in cols:
-			with engine.begin() as conn:
-				conn.execute(text('ALTER TABLE tasks ADD COLUMN description TEXT'))
-	except Exception:
-		# best-effort; ignore errors to not block startup
-		pass
+@asynccontextmanager
+async def lifespan(app):
+	# start bcrypt workers up front instead of on the first login
+	hash_pool.start()
+	yield
+	hash_pool.shutdown()
 
-_ensure_schema()
-
-app = FastAPI(title="TaskMaster MVP")
+app = FastAPI(title="TaskMaster MVP", lifespan=lifespan)
 
 # API routers
 app.include_router(auth.router)
 app.include_router(tasks.router)
+if METRICS_ENABLED:
+	app.include_router(metrics.router)
+
+# per-route request counts and latency histograms, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+# per-request SQL count/time as Server-Timing, and route query budgets
+app.add_middleware(QueryProfilerMiddleware)
+# outermost: compress large dynamic responses; skips SSE and the precompressed
+# static files, which already carry a Content-Encoding
+if COMPRESS_MIN_BYTES > 0:
+	app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES, compresslevel=COMPRESS_LEVEL)
 
-# Serve a minimal frontend SPA from / (index.html in app/frontend)
-app.mount("/", StaticFiles(directory="app/frontend", html=True), name="frontend")
+# Serve a minimal frontend SPA from / (index.html in app/frontend): the
+# hashed/precompressed build when present (python -m app.build_frontend)
+frontend_dir = FRONTEND_BUILD_DIR if os.path.isfile(os.path.join(FRONTEND_BUILD_DIR, "manifest.json")) else FRONTEND_SOURCE_DIR
+app.mount("/", PrecompressedStaticFiles(directory=frontend_dir, html=True), name="frontend")
 
 # Generic error handler to return JSON errors for unexpected exceptions
 @app.exception_handler(Exception)
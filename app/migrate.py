@@ -0,0 +1,31 @@
+"""Apply database migrations (app/migrations) to DATABASE_URL.
+
+    python -m app.migrate            # apply everything pending
+    python -m app.migrate --status   # list migrations and whether they are applied
+    python -m app.migrate --target 2 # stop after version 2
+"""
+import argparse
+import sys
+
+from app.database import engine
+from app.migrations import migrate, status
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.migrate", description=__doc__.splitlines()[0])
+    parser.add_argument("--status", action="store_true", help="show migration status and exit")
+    parser.add_argument("--target", type=int, help="highest version to apply")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        for m, applied in status(engine):
+            print(f"{'applied' if applied else 'pending'}  {m.version:04d}_{m.name}")
+        return 0
+    applied = migrate(engine, target=args.target)
+    if not applied:
+        print("database is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+"""users and tasks, as the app first created them; adds tasks.description to
+databases created before it existed.
+"""
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table, Text, inspect, text
+
+meta = MetaData()
+Table(
+    "users",
+    meta,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("password", String, nullable=False),
+)
+Table(
+    "tasks",
+    meta,
+    Column("id", Integer, primary_key=True),
+    Column("title", String, nullable=False),
+    Column("description", Text, nullable=True),
+    Column("user_email", String, ForeignKey("users.email")),
+)
+
+
+def upgrade(conn):
+    meta.create_all(conn)
+    if "description" not in [c["name"] for c in inspect(conn).get_columns("tasks")]:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN description TEXT"))
@@ -0,0 +1,11 @@
+"""users.task_count (backfilled) and users.tasks_version, maintained by the task write paths."""
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    cols = [c["name"] for c in inspect(conn).get_columns("users")]
+    if "task_count" not in cols:
+        conn.execute(text("ALTER TABLE users ADD COLUMN task_count INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("UPDATE users SET task_count = (SELECT count(*) FROM tasks WHERE tasks.user_email = users.email)"))
+    if "tasks_version" not in cols:
+        conn.execute(text("ALTER TABLE users ADD COLUMN tasks_version INTEGER NOT NULL DEFAULT 0"))
@@ -0,0 +1,38 @@
+"""Full-text search index over task title + description (see app.utils.search).
+
+SQLite: contentless FTS5 table kept in sync by triggers, backfilled from
+existing rows. PostgreSQL: GIN index on the search tsvector.
+"""
+from sqlalchemy import inspect, text
+
+_FTS_ROW = "{0}.id, {0}.title, {0}.description, hex({0}.user_email)"
+
+SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+    "title, description, owner, content='', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    f"INSERT INTO tasks_fts(rowid, title, description, owner) VALUES ({_FTS_ROW.format('new')}); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    f"INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner) VALUES ('delete', {_FTS_ROW.format('old')}); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE ON tasks BEGIN "
+    f"INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner) VALUES ('delete', {_FTS_ROW.format('old')}); "
+    f"INSERT INTO tasks_fts(rowid, title, description, owner) VALUES ({_FTS_ROW.format('new')}); END",
+]
+SQLITE_BACKFILL = f"INSERT INTO tasks_fts(rowid, title, description, owner) SELECT {_FTS_ROW.format('tasks')} FROM tasks"
+
+POSTGRESQL = [
+    "CREATE INDEX IF NOT EXISTS ix_tasks_search ON tasks USING gin ("
+    "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, '')))",
+]
+
+
+def upgrade(conn):
+    if conn.dialect.name == "sqlite":
+        existed = "tasks_fts" in inspect(conn).get_table_names()
+        for stmt in SQLITE:
+            conn.execute(text(stmt))
+        if not existed:
+            conn.execute(text(SQLITE_BACKFILL))
+    elif conn.dialect.name == "postgresql":
+        for stmt in POSTGRESQL:
+            conn.execute(text(stmt))
@@ -0,0 +1,18 @@
+"""refresh_tokens: hashed, revocable refresh tokens issued at login."""
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table
+
+meta = MetaData()
+Table("users", meta, Column("id", Integer, primary_key=True))
+refresh_tokens = Table(
+    "refresh_tokens",
+    meta,
+    Column("id", Integer, primary_key=True),
+    Column("token_hash", String(64), unique=True, index=True, nullable=False),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False),
+    Column("expires_at", Integer, nullable=False),
+    Column("revoked_at", Integer, nullable=True),
+)
+
+
+def upgrade(conn):
+    refresh_tokens.create(conn, checkfirst=True)
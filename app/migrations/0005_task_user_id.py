@@ -0,0 +1,74 @@
+"""tasks.user_id: integer owner FK (backfilled from tasks.user_email) and the
+(user_id, id) index listings, counts and ownership checks run on.
+
+Expand step of the user_email -> user_id move: user_email stays, a trigger
+fills whichever of the two an INSERT leaves empty and (SQLite) the search index
+is rebuilt to match on either owner, so instances of the previous release keep
+working alongside the new one during a rolling deploy. 0006 drops user_email
+once every instance runs the new code (python -m app.migrate --target 5 first).
+
+Large PostgreSQL tables: build the index without blocking writes beforehand with
+``CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_user_id_id ON tasks (user_id, id)``;
+the statement below is then a no-op.
+"""
+from sqlalchemy import inspect, text
+
+BACKFILL = "UPDATE tasks SET user_id = (SELECT id FROM users WHERE users.email = tasks.user_email) WHERE user_id IS NULL"
+INDEX = "CREATE INDEX IF NOT EXISTS ix_tasks_user_id_id ON tasks (user_id, id)"
+
+# AFTER INSERT triggers fire in no guaranteed order, so the FTS triggers skip
+# rows until the sync trigger has filled both owner columns. Meanwhile the FTS
+# owner holds both the email (hex, searched by the previous release) and the
+# user id (searched by the new one).
+_FTS_ROW = "{0}.id, {0}.title, {0}.description, hex({0}.user_email) || ' ' || {0}.user_id"
+_OWNED = "{0}.user_id IS NOT NULL AND {0}.user_email IS NOT NULL"
+
+SQLITE = [
+    "DROP TRIGGER IF EXISTS tasks_fts_ai",
+    "DROP TRIGGER IF EXISTS tasks_fts_ad",
+    "DROP TRIGGER IF EXISTS tasks_fts_au",
+    "DROP TABLE IF EXISTS tasks_fts",
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+    "title, description, owner, content='', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS tasks_owner_sync AFTER INSERT ON tasks "
+    "WHEN NEW.user_id IS NULL OR NEW.user_email IS NULL BEGIN "
+    "UPDATE tasks SET "
+    "user_id = coalesce(NEW.user_id, (SELECT id FROM users WHERE email = NEW.user_email)), "
+    "user_email = coalesce(NEW.user_email, (SELECT email FROM users WHERE id = NEW.user_id)) "
+    "WHERE id = NEW.id; END",
+    f"CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks WHEN {_OWNED.format('new')} BEGIN "
+    f"INSERT INTO tasks_fts(rowid, title, description, owner) VALUES ({_FTS_ROW.format('new')}); END",
+    f"CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks WHEN {_OWNED.format('old')} BEGIN "
+    f"INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner) VALUES ('delete', {_FTS_ROW.format('old')}); END",
+    "CREATE TRIGGER tasks_fts_au AFTER UPDATE ON tasks BEGIN "
+    f"INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner) SELECT 'delete', {_FTS_ROW.format('old')} WHERE {_OWNED.format('old')}; "
+    f"INSERT INTO tasks_fts(rowid, title, description, owner) SELECT {_FTS_ROW.format('new')} WHERE {_OWNED.format('new')}; END",
+    f"INSERT INTO tasks_fts(rowid, title, description, owner) SELECT {_FTS_ROW.format('tasks')} FROM tasks WHERE {_OWNED.format('tasks')}",
+]
+
+POSTGRESQL = [
+    """CREATE OR REPLACE FUNCTION tasks_owner_sync() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.user_id IS NULL THEN
+            SELECT id INTO NEW.user_id FROM users WHERE email = NEW.user_email;
+        END IF;
+        IF NEW.user_email IS NULL THEN
+            SELECT email INTO NEW.user_email FROM users WHERE id = NEW.user_id;
+        END IF;
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS tasks_owner_sync ON tasks",
+    "CREATE TRIGGER tasks_owner_sync BEFORE INSERT ON tasks FOR EACH ROW EXECUTE FUNCTION tasks_owner_sync()",
+]
+
+
+def upgrade(conn):
+    cols = [c["name"] for c in inspect(conn).get_columns("tasks")]
+    if "user_email" not in cols:
+        return  # already contracted (0006)
+    if "user_id" not in cols:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN user_id INTEGER REFERENCES users(id)"))
+    conn.execute(text(BACKFILL))
+    conn.execute(text(INDEX))
+    for stmt in {"sqlite": SQLITE, "postgresql": POSTGRESQL}.get(conn.dialect.name, []):
+        conn.execute(text(stmt))
@@ -0,0 +1,58 @@
+"""Drop tasks.user_email (contract step of 0005) and make tasks.user_id NOT NULL.
+
+Tasks whose user_email matched no user (possible only where foreign keys were
+not enforced) had no reachable owner and are deleted. On SQLite the table is
+rebuilt, since a column in a foreign key cannot be dropped there, and the FTS
+index is rebuilt with the user id as its owner token.
+"""
+from sqlalchemy import inspect, text
+
+SQLITE = [
+    "DROP TRIGGER IF EXISTS tasks_owner_sync",
+    "DROP TRIGGER IF EXISTS tasks_fts_ai",
+    "DROP TRIGGER IF EXISTS tasks_fts_ad",
+    "DROP TRIGGER IF EXISTS tasks_fts_au",
+    "DROP TABLE IF EXISTS tasks_fts",
+    "CREATE TABLE tasks_new ("
+    "id INTEGER NOT NULL PRIMARY KEY, title VARCHAR NOT NULL, description TEXT, "
+    "user_id INTEGER NOT NULL REFERENCES users (id))",
+    "INSERT INTO tasks_new (id, title, description, user_id) "
+    "SELECT id, title, description, user_id FROM tasks WHERE user_id IS NOT NULL",
+    "DROP TABLE tasks",
+    "ALTER TABLE tasks_new RENAME TO tasks",
+    "CREATE INDEX ix_tasks_user_id_id ON tasks (user_id, id)",
+]
+
+# same FTS objects as 0003, with the owner column now holding user_id
+_FTS_ROW = "{0}.id, {0}.title, {0}.description, {0}.user_id"
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+    "title, description, owner, content='', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    f"INSERT INTO tasks_fts(rowid, title, description, owner) VALUES ({_FTS_ROW.format('new')}); END",
+    "CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    f"INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner) VALUES ('delete', {_FTS_ROW.format('old')}); END",
+    "CREATE TRIGGER tasks_fts_au AFTER UPDATE ON tasks BEGIN "
+    f"INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner) VALUES ('delete', {_FTS_ROW.format('old')}); "
+    f"INSERT INTO tasks_fts(rowid, title, description, owner) VALUES ({_FTS_ROW.format('new')}); END",
+    f"INSERT INTO tasks_fts(rowid, title, description, owner) SELECT {_FTS_ROW.format('tasks')} FROM tasks",
+]
+
+POSTGRESQL = [
+    "DROP TRIGGER IF EXISTS tasks_owner_sync ON tasks",
+    "DROP FUNCTION IF EXISTS tasks_owner_sync()",
+    "DELETE FROM tasks WHERE user_id IS NULL",
+    "ALTER TABLE tasks ALTER COLUMN user_id SET NOT NULL",
+    "ALTER TABLE tasks DROP COLUMN user_email",
+]
+
+
+def upgrade(conn):
+    if "user_email" not in [c["name"] for c in inspect(conn).get_columns("tasks")]:
+        return
+    if conn.dialect.name == "sqlite":
+        for stmt in SQLITE + SQLITE_FTS:
+            conn.execute(text(stmt))
+    elif conn.dialect.name == "postgresql":
+        for stmt in POSTGRESQL:
+            conn.execute(text(stmt))
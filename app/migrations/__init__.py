@@ -0,0 +1,92 @@
+"""Versioned schema migrations.
+
+Each module ``NNNN_<name>.py`` in this package defines ``upgrade(conn)``.
+Migrations are applied in version order, each in its own transaction
+together with its ``schema_version`` row, so a failed migration leaves
+nothing half-applied. They are written to be idempotent, so databases
+built by the old startup-time ``create_all`` are adopted as-is.
+
+Run them once before deploying: ``python -m app.migrate``. The app itself
+does no DDL at startup.
+"""
+import importlib
+import pkgutil
+import time
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, select
+from sqlalchemy.engine import Connection, Engine
+
+_meta = MetaData()
+schema_version = Table(
+    "schema_version",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", Integer, nullable=False),
+)
+
+# any constant works; it only has to be the same for every runner
+_PG_LOCK_KEY = 0x7A5C
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    module: str
+
+
+def discover() -> List[Migration]:
+    """All migration modules of this package, in version order."""
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        prefix, _, name = info.name.partition("_")
+        if prefix.isdigit():
+            found.append(Migration(int(prefix), name, f"{__name__}.{info.name}"))
+    found.sort()
+    versions = [m.version for m in found]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"duplicate migration versions: {versions}")
+    return found
+
+
+def _begin(conn: Connection):
+    """Serialize concurrent runners: the whole migration holds the write lock."""
+    if conn.dialect.name == "sqlite":
+        # pysqlite runs DDL outside any transaction unless we open one ourselves
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    elif conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({_PG_LOCK_KEY})")
+
+
+def applied_versions(conn: Connection) -> set:
+    schema_version.create(conn, checkfirst=True)
+    return set(conn.scalars(select(schema_version.c.version)))
+
+
+def status(engine: Engine) -> List[tuple]:
+    """[(migration, applied: bool)] for every known migration."""
+    with engine.begin() as conn:
+        applied = applied_versions(conn)
+    return [(m, m.version in applied) for m in discover()]
+
+
+def migrate(engine: Engine, target: Optional[int] = None, log=print) -> List[Migration]:
+    """Apply pending migrations up to ``target`` (default: all). Returns those applied."""
+    done = []
+    for m in discover():
+        if target is not None and m.version > target:
+            break
+        with engine.connect() as conn:
+            _begin(conn)
+            # re-checked under the lock: another runner may have applied it
+            if m.version in applied_versions(conn):
+                conn.rollback()
+                continue
+            t0 = time.perf_counter()
+            importlib.import_module(m.module).upgrade(conn)
+            conn.execute(schema_version.insert().values(version=m.version, name=m.name, applied_at=int(time.time())))
+            conn.commit()
+        log(f"applied {m.version:04d}_{m.name} in {(time.perf_counter() - t0) * 1000:.0f}ms")
+        done.append(m)
+    return done
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from app.database import Base
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    # sha256 of the token; the token itself is only ever held by the client
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    # unix timestamps, like the JWT exp claim
+    expires_at = Column(Integer, nullable=False)
+    # set when the token is rotated away; logout deletes the row instead, so a
+    # revoked token presented again is a replay (see /auth/refresh)
+    revoked_at = Column(Integer, nullable=True)
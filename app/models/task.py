@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DDL, Index, event, select
+from sqlalchemy.orm import column_property
 from app.database import Base
+from app.models.user import User
 
 class Task(Base):
     __tablename__ = "tasks"
@@ -7,4 +9,52 @@ class Task(Base):
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    user_email = Column(String, ForeignKey("users.email"))
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # the owner's email as the API has always returned it; tasks only store user_id
+    user_email = column_property(select(User.email).where(User.id == user_id).scalar_subquery())
+
+    # a user's tasks in id order straight from the index: listings, counts,
+    # keyset pages and ownership checks never touch the table rows
+    __table_args__ = (Index("ix_tasks_user_id_id", "user_id", "id"),)
+
+
+def owner_id(email: str):
+    """Scalar subquery for the id of the user with ``email``, for filters and
+    INSERT values where only the caller's email (the token subject) is at hand.
+    """
+    return select(User.id).where(User.email == email).scalar_subquery()
+
+
+# Full-text search index over title + description, per dialect.
+# SQLite: contentless FTS5 table kept in sync by triggers on tasks; the owner
+# column lets a search intersect with the user's rows inside the index.
+# PostgreSQL: GIN index on the same tsvector expression used by app.utils.search.
+# Emitted by metadata.create_all (tests, tools); deployed databases get the
+# same objects from app/migrations.
+SEARCH_VECTOR_SQL = "to_tsvector('simple', coalesce(tasks.title, '') || ' ' || coalesce(tasks.description, ''))"
+
+# owner is the user id, a single token, so matching it is one doclist lookup
+_FTS_ROW = "{0}.id, {0}.title, {0}.description, {0}.user_id"
+SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "title, description, owner, content='', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+        f"INSERT INTO tasks_fts(rowid, title, description, owner) VALUES ({_FTS_ROW.format('new')}); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+        f"INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner) VALUES ('delete', {_FTS_ROW.format('old')}); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE ON tasks BEGIN "
+        f"INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner) VALUES ('delete', {_FTS_ROW.format('old')}); "
+        f"INSERT INTO tasks_fts(rowid, title, description, owner) VALUES ({_FTS_ROW.format('new')}); END",
+    ],
+    "postgresql": [
+        "CREATE INDEX IF NOT EXISTS ix_tasks_search ON tasks USING gin ("
+        + SEARCH_VECTOR_SQL.replace("tasks.", "") + ")",
+    ],
+}
+
+for _dialect, _statements in SEARCH_DDL.items():
+    for _stmt in _statements:
+        event.listen(Task.__table__, "after_create", DDL(_stmt).execute_if(dialect=_dialect))
+
+event.listen(Task.__table__, "before_drop", DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite"))
@@ -7,3 +7,7 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
+    # maintained by the task write paths so listings don't have to count rows
+    task_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # bumped on every change to the user's tasks; drives ETags on listings
+    tasks_version = Column(Integer, nullable=False, default=0, server_default="0")
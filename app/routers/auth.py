@@ -1,35 +1,123 @@
+import time
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user import UserCreate, UserOut
+from app.schemas.token import TokenRefresh
 from app.models.user import User
-from app.utils.auth import hash_password, verify_password, create_token
-from app.database import get_db
+from app.models.refresh_token import RefreshToken
+from app.utils.auth import hash_password, verify_password, create_token, create_refresh_token, hash_refresh_token
+from app.utils.hash_pool import hash_pool, HashPoolSaturated
+from app.utils.profiling import query_budget
+from app.database import get_async_write_db
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+
+async def _run_hash(fn, *args):
+    """Run a bcrypt call on the hash pool, mapping saturation to 503 + Retry-After."""
+    try:
+        return await hash_pool.run(fn, *args)
+    except HashPoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def _issue_tokens(db: AsyncSession, user_id: int, email: str) -> dict:
+    """Store a new refresh token for the user and return it with a fresh access token (commits).
+
+    The user's expired refresh tokens are purged on the way, so rotated ones
+    are kept only as long as a replay of them would otherwise be accepted.
+    """
+    refresh, token_hash, expires_at = create_refresh_token()
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.expires_at < int(time.time())))
+    db.add(RefreshToken(token_hash=token_hash, user_id=user_id, expires_at=expires_at))
+    await db.commit()
+    return {"token": create_token({"sub": email}), "refresh_token": refresh}
+
 @router.post("/register", response_model=UserOut)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    exists = db.query(User).filter(User.email == user.email).first()
+@query_budget(2)
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_write_db)):
+    # cheap check first so a duplicate does not cost a bcrypt hash; the
+    # transaction ends before hashing so none is open meanwhile
+    exists = (await db.execute(select(User.id).where(User.email == user.email))).first()
+    await db.rollback()
     if exists:
         raise HTTPException(status_code=400, detail="Email already exists")
-
     try:
-        hashed = hash_password(user.password)
+        hashed = await _run_hash(hash_password, user.password)
     except ValueError as e:
         # map hashing/validation errors to a 400 so client gets a clear message
         raise HTTPException(status_code=400, detail=str(e))
 
-    new_user = User(email=user.email, password=hashed)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    # the unique index on users.email still rejects a concurrent duplicate
+    try:
+        new_user = (await db.execute(
+            insert(User).values(email=user.email, password=hashed).returning(User.id, User.email)
+        )).one()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already exists")
     return new_user
 
 @router.post("/login")
-def login(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.password):
+@query_budget(3)
+async def login(user: UserCreate, db: AsyncSession = Depends(get_async_write_db)):
+    # plain columns: they survive ending the transaction before hashing
+    db_user = (await db.execute(select(User.id, User.email, User.password).where(User.email == user.email))).first()
+    await db.rollback()
+    if not db_user or not await _run_hash(verify_password, user.password, db_user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token = create_token({"sub": db_user.email})
-    return {"token": token}
+    return await _issue_tokens(db, db_user.id, db_user.email)
+
+@router.post("/refresh")
+@query_budget(4)
+async def refresh(body: TokenRefresh, db: AsyncSession = Depends(get_async_write_db)):
+    """Trade a refresh token for a new access token without a password (no bcrypt).
+
+    Refresh tokens rotate: the presented one is revoked and a new one returned.
+    Only rotation marks a token revoked (logout deletes it), so presenting a
+    revoked token means it was copied: every token of that user is deleted.
+    """
+    now = int(time.time())
+    row = (await db.execute(
+        select(RefreshToken, User.email)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(body.refresh_token))
+    )).first()
+    if not row:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    stored, email = row
+    if stored.revoked_at is not None:
+        await db.execute(delete(RefreshToken).where(RefreshToken.user_id == stored.user_id))
+        await db.commit()
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+    if stored.expires_at < now:
+        raise HTTPException(status_code=401, detail="Refresh token has expired")
+
+    # conditional revoke so two concurrent refreshes cannot both rotate the same token
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+    return await _issue_tokens(db, stored.user_id, email)
+
+@router.post("/logout")
+@query_budget(1)
+async def logout(body: TokenRefresh, db: AsyncSession = Depends(get_async_write_db)):
+    """Revoke a refresh token by deleting it; a later replay is then just an
+    unknown token, not a reuse of a rotated one. Unknown or rotated tokens are
+    accepted silently.
+    """
+    await db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.token_hash == hash_refresh_token(body.refresh_token), RefreshToken.revoked_at.is_(None))
+    )
+    await db.commit()
+    return {"detail": "logged out"}
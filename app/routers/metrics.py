@@ -0,0 +1,48 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response
+
+from app.cache import response_cache
+from app.config import METRICS_TOKEN
+from app.events import broker
+from app.database import engine, async_engine, replica_engines
+from app.utils.auth import token_cache
+from app.utils.hash_pool import hash_pool
+from app.utils.metrics import CONTENT_TYPE, registry, counter_lines, gauge_lines, pool_samples
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus text exposition: request/latency, bcrypt, JWT and DB pool
+    histograms, plus pool, hash pool, cache and change feed gauges read at scrape time.
+    Requires ``Authorization: Bearer <METRICS_TOKEN>`` when that is set.
+    """
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+    lines = registry.render()
+    pools = {"sync": engine.pool, "async": async_engine.sync_engine.pool}
+    pools.update((f"replica{i}", replica.sync_engine.pool) for i, replica in enumerate(replica_engines))
+    lines += pool_samples(pools)
+    lines += gauge_lines("password_hash_in_flight", "bcrypt calls running or queued.", [({}, hash_pool.in_flight)])
+    lines += gauge_lines("password_hash_capacity", "bcrypt calls admitted before 503.", [({}, hash_pool.capacity)])
+
+    tokens = token_cache.stats()
+    lines += gauge_lines("token_cache_entries", "Verified JWTs cached.", [({}, tokens["size"])])
+    lines += counter_lines("token_cache_lookups_total", "Token cache lookups by result.",
+                         [({"result": "hit"}, tokens["hits"]), ({"result": "miss"}, tokens["misses"])])
+    if broker is not None:
+        lines += gauge_lines("events_subscribers", "Open change feed (SSE) connections in this process.",
+                             [({}, broker.stats()["subscribers"])])
+
+    cache = await response_cache.stats()
+    lines += counter_lines("response_cache_lookups_total", "Listing cache lookups by result.",
+                         [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"]), ({"result": "error"}, cache["errors"])])
+    lines += gauge_lines("response_cache_hit_ratio", "Listing cache hits / lookups.", [({}, cache["hit_ratio"])])
+    memory = cache.get("bytes", cache.get("used_memory"))
+    if memory is not None:
+        lines += gauge_lines("response_cache_bytes", "Memory used by the listing cache backend.", [({}, memory)])
+    return Response("\n".join(lines) + "\n", media_type=CONTENT_TYPE)
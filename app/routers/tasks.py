@@ -1,14 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from datetime import datetime, UTC
-from jose import jwt, JWTError, ExpiredSignatureError
-from sqlalchemy.orm import Session
-from typing import Optional
-from sqlalchemy import inspect
+import time
+from jose import JWTError, ExpiredSignatureError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+from pydantic import ValidationError
+from sqlalchemy import bindparam, column, select, func, insert, delete, literal, update, values
 from app.schemas.task import TaskCreate, TaskOut
-from app.models.task import Task
-from app.database import get_db
-from app.config import SECRET_KEY, ALGORITHM
+from app.models.task import Task, owner_id
+from app.models.user import User
+from app.cache import response_cache, write_marks
+from app.events import broker, publish as publish_changes
+from app.database import AsyncWriteSessionLocal, async_engine, get_async_write_db, read_sessionmaker
+from app.utils.auth import decode_token
+from app.config import BULK_MAX_ITEMS, EXPORT_BATCH_SIZE, IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS, IMPORT_MAX_RECORD_SIZE
+from app.config import TASK_GROUP_COMMIT, GROUP_COMMIT_WINDOW_MS, GROUP_COMMIT_MAX_BATCH, EVENTS_KEEPALIVE_SECONDS
+from app.utils.importer import iter_records
+from app.utils.etag import make_etag, etag_matches
+from app.utils.group_commit import GroupCommitter
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.profiling import query_budget
+from app.utils.search import apply_search
+from app.utils.serialization import FastJSONResponse, dumps
 
+import csv
+import io
 from math import ceil
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
@@ -31,8 +48,7 @@ def get_current_user(authorization: Optional[str] = Header(None), token: Optiona
         # FastAPI validation behavior for missing required params in tests.
         raise HTTPException(status_code=422, detail="Missing token")
     try:
-        # jwt.decode validates exp automatically
-        payload = jwt.decode(tok, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(tok)
         email = payload.get("sub")
         if not email:
             raise HTTPException(status_code=401, detail="Invalid token: missing user")
@@ -42,46 +58,492 @@ def get_current_user(authorization: Optional[str] = Header(None), token: Optiona
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def _unknown_user() -> HTTPException:
+    """Error for a valid token whose user no longer exists."""
+    return HTTPException(status_code=401, detail="Invalid token: unknown user")
+
+def _insert_tasks(user: str, rows: List[Dict[str, Any]]):
+    """One INSERT ... SELECT of ``rows`` ({title, description}) for the user with
+    email ``user``, RETURNING the new tasks. A user that no longer exists
+    matches nothing, so nothing is inserted and no row comes back; this does not
+    rely on tasks.user_id being NOT NULL (it is nullable until migration 0006).
+    """
+    new = values(column("title", Task.title.type), column("description", Task.description.type), name="new_tasks")
+    new = new.data([(row["title"], row["description"]) for row in rows]).cte()
+    owned = select(new.c.title, new.c.description, User.id).select_from(new.join(User, User.email == user))
+    return insert(Task).from_select(["title", "description", "user_id"], owned).returning(Task.id, Task.title, Task.description)
+
+async def _record_task_change(db: AsyncSession, user: str, delta: int):
+    """Adjust the user's task counter and bump their listing version inside the
+    caller's transaction. No-op when nothing changed. Call _task_change_committed
+    after the commit.
+    """
+    if delta:
+        await db.execute(
+            update(User)
+            .where(User.email == user)
+            .values(task_count=User.task_count + delta, tasks_version=User.tasks_version + 1)
+        )
+
+async def _task_change_committed(user: str, delta: int, changes: Optional[List[Dict[str, Any]]] = None):
+    """Invalidate the user's cached listings once their write is committed, keep
+    their reads on the primary for a while (read-your-writes) and push
+    ``changes`` to their change feeds (a reset when the caller has none to give)."""
+    if delta:
+        await response_cache.invalidate(user)
+        await write_marks.mark(user)
+        await publish_changes(user, changes or [{"type": "reset"}])
+
+async def get_read_db(authorization: Optional[str] = Header(None), token: Optional[str] = None):
+    """Session for read-only routes: a read replica, or the primary when none is
+    configured or the caller wrote recently."""
+    primary = False
+    if write_marks.enabled:
+        primary = await write_marks.recent(get_current_user(authorization, token))
+    async with read_sessionmaker(primary)() as db:
+        yield db
+
+async def _create_tasks_committed(items: List[Dict[str, Any]]) -> List[Any]:
+    """Group-commit flush: insert the queued creations of any number of users in
+    one transaction (3 statements whatever the batch size) and return each
+    item's new task, or an exception for items whose user no longer exists.
+    """
+    async with AsyncWriteSessionLocal() as db:
+        emails = {item["user_email"] for item in items}
+        user_ids = dict((await db.execute(select(User.email, User.id).where(User.email.in_(emails)))).all())
+        rows, per_user = [], {}
+        for item in items:
+            email = item["user_email"]
+            if email in user_ids:
+                rows.append({"title": item["title"], "description": item["description"], "user_id": user_ids[email]})
+                per_user[email] = per_user.get(email, 0) + 1
+        created = []
+        if rows:
+            # unordered multi-row RETURNING (see create_tasks_bulk): pair by content
+            created = (await db.execute(insert(Task).returning(Task.id, Task.title, Task.description, Task.user_id), rows)).all()
+            # _record_task_change for every user in the batch, as one executemany
+            users = User.__table__
+            await db.execute(
+                update(users)
+                .where(users.c.id == bindparam("uid"))
+                .values(task_count=users.c.task_count + bindparam("n"), tasks_version=users.c.tasks_version + 1),
+                [{"uid": user_ids[email], "n": n} for email, n in per_user.items()],
+            )
+            await db.commit()
+
+    by_content: Dict[tuple, list] = {}
+    for row in sorted(created, key=lambda r: r.id, reverse=True):
+        by_content.setdefault((row.user_id, row.title, row.description), []).append(row)
+    results = []
+    for item in items:
+        uid = user_ids.get(item["user_email"])
+        if uid is None:
+            results.append(_unknown_user())
+            continue
+        row = by_content[(uid, item["title"], item["description"])].pop()
+        results.append({"id": row.id, "title": row.title, "description": row.description, "user_email": item["user_email"]})
+    changes: Dict[str, list] = {}
+    for result in results:
+        if isinstance(result, dict):
+            changes.setdefault(result["user_email"], []).append({"type": "created", "task": result})
+    for email, n in per_user.items():
+        await _task_change_committed(email, n, changes[email])
+    return results
+
+_group_commit = GroupCommitter(_create_tasks_committed, GROUP_COMMIT_WINDOW_MS / 1000, GROUP_COMMIT_MAX_BATCH)
+
 @router.post("/", response_model=TaskOut)
-def create_task(task: TaskCreate, db: Session = Depends(get_db), authorization: Optional[str] = Header(None), token: Optional[str] = None):
+@query_budget(2)
+async def create_task(task: TaskCreate, db: AsyncSession = Depends(get_async_write_db), authorization: Optional[str] = Header(None), token: Optional[str] = None):
+    """Create a task. With TASK_GROUP_COMMIT on, it is committed together with
+    other requests' creations (see app.utils.group_commit); either way the
+    response is sent once the task is committed.
+    """
+    user = get_current_user(authorization, token)
+    if TASK_GROUP_COMMIT:
+        return await _group_commit.submit({"title": task.title, "description": task.description or "", "user_email": user})
+    # RETURNING hands back the new row, no SELECT after the commit
+    new = (await db.execute(_insert_tasks(user, [{"title": task.title, "description": task.description or ""}]))).first()
+    if new is None:
+        raise _unknown_user()
+    await _record_task_change(db, user, 1)
+    await db.commit()
+    created = {**new._mapping, "user_email": user}
+    await _task_change_committed(user, 1, [{"type": "created", "task": created}])
+    return created
+
+def _check_bulk_size(n: int):
+    if n > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Too many items: at most {BULK_MAX_ITEMS} per request")
+
+@router.post("/bulk")
+@query_budget(2)
+async def create_tasks_bulk(items: List[Dict[str, Any]] = Body(...), db: AsyncSession = Depends(get_async_write_db), authorization: Optional[str] = Header(None), token: Optional[str] = None):
+    """Create many tasks in one transaction with a batched multi-row INSERT.
+
+    Each item is validated like POST /tasks/; invalid items are reported and
+    skipped. Returns {created, failed, results} with one result per item, in order.
+    """
+    user = get_current_user(authorization, token)
+    _check_bulk_size(len(items))
+    results: List[Dict[str, Any]] = [None] * len(items)
+    rows, positions = [], []
+    for i, item in enumerate(items):
+        try:
+            task = TaskCreate(**item)
+        except ValidationError as e:
+            results[i] = {"index": i, "status": 422, "error": "; ".join(err["msg"] for err in e.errors())}
+            continue
+        rows.append({"title": task.title, "description": task.description or ""})
+        positions.append(i)
+
+    if rows:
+        # RETURNING order is not guaranteed for multi-row INSERTs, so pair rows
+        # back to items by content; identical items are interchangeable
+        created = (await db.execute(_insert_tasks(user, rows))).mappings().all()
+        if not created:
+            raise _unknown_user()
+        await _record_task_change(db, user, len(created))
+        await db.commit()
+        by_content = {}
+        for task in sorted(created, key=lambda t: t["id"], reverse=True):
+            by_content.setdefault((task["title"], task["description"]), []).append(task)
+        for i, row in zip(positions, rows):
+            task = by_content[(row["title"], row["description"])].pop()
+            results[i] = {"index": i, "status": 201, "task": {**task, "user_email": user}}
+        await _task_change_committed(user, len(created), [
+            {"type": "created", "task": results[i]["task"]} for i in positions
+        ])
+    return FastJSONResponse({"created": len(rows), "failed": len(items) - len(rows), "results": results})
+
+@router.delete("/bulk")
+@query_budget(3)
+async def delete_tasks_bulk(ids: List[int] = Body(...), db: AsyncSession = Depends(get_async_write_db), authorization: Optional[str] = Header(None), token: Optional[str] = None):
+    """Delete many tasks in one transaction. Returns {deleted, results} with a
+    200/403/404 status per id, in input order, mirroring DELETE /tasks/{id}; a
+    repeated id is a 404 "already deleted" once its first occurrence deleted it.
+    """
     user = get_current_user(authorization, token)
-    new = Task(title=task.title, description=(task.description or ""), user_email=user)
-    db.add(new)
-    db.commit()
-    db.refresh(new)
-    return new
+    _check_bulk_size(len(ids))
+    unique = list(dict.fromkeys(ids))
+    deleted = set()
+    if unique:
+        deleted = set((await db.scalars(
+            delete(Task).where(Task.id.in_(unique), Task.user_id == owner_id(user)).returning(Task.id)
+        )).all())
+    missing = [i for i in unique if i not in deleted]
+    # only ids that were not ours need a lookup, to tell 403 from 404
+    others = set((await db.scalars(select(Task.id).where(Task.id.in_(missing))))) if missing else set()
+    await _record_task_change(db, user, -len(deleted))
+    await db.commit()
+    await _task_change_committed(user, -len(deleted), [{"type": "deleted", "id": i} for i in unique if i in deleted])
+    results = []
+    reported = set()
+    for i in ids:
+        if i in deleted and i in reported:
+            results.append({"id": i, "status": 404, "error": "Task already deleted"})
+        elif i in deleted:
+            reported.add(i)
+            results.append({"id": i, "status": 200})
+        elif i in others:
+            results.append({"id": i, "status": 403, "error": "Not allowed to delete this task"})
+        else:
+            results.append({"id": i, "status": 404, "error": "Task not found"})
+    return FastJSONResponse({"deleted": len(deleted), "results": results})
+
+TASK_COLUMNS = (Task.id, Task.title, Task.description, Task.user_email)
+
+def _row_dicts(rows, keys) -> List[Dict[str, Any]]:
+    # dict(zip()) is several times faster than Row._asdict() on large pages
+    return [dict(zip(keys, row)) for row in rows]
+
+def _select_columns(fields: Optional[str], user: str):
+    """Columns for a ``fields=id,title`` projection of ``user``'s tasks, in
+    TASK_COLUMNS order; all of them when omitted. id is always included (cursors
+    and clients key on it). Unknown names are a 400.
+    """
+    wanted = {c.key for c in TASK_COLUMNS}
+    if fields:
+        wanted = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = wanted - {c.key for c in TASK_COLUMNS}
+        if unknown:
+            allowed = ", ".join(c.key for c in TASK_COLUMNS)
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))} (allowed: {allowed})")
+        wanted.add("id")
+    # every row is the caller's, so their email is a constant rather than a
+    # users lookup per row
+    return tuple(
+        literal(user).label("user_email") if c.key == "user_email" else c
+        for c in TASK_COLUMNS if c.key in wanted
+    )
+
+FIELDS_QUERY = Query(None, description="Comma-separated columns to return, e.g. id,title (id is always included)")
+
+async def _fetch_dicts(db: AsyncSession, query) -> List[Dict[str, Any]]:
+    result = await db.execute(query)
+    return _row_dicts(result, result.keys())
 
 @router.get("/")
-def list_tasks(q: Optional[str] = Query(None, description="Search by title"), page: Optional[int] = None, limit: Optional[int] = None, db: Session = Depends(get_db), authorization: Optional[str] = Header(None), token: Optional[str] = None):
-    """If page and limit are provided, return paginated result dict {items,page,limit,total,pages}.
+@query_budget(3)
+async def list_tasks(request: Request, q: Optional[str] = Query(None, description="Full-text search over title and description"), page: Optional[int] = None, limit: Optional[int] = None, cursor: Optional[str] = Query(None, description="Opaque keyset cursor; pass an empty value to start"), include_total: bool = Query(True, description="Set false to skip counting (total/pages come back null)"), fields: Optional[str] = FIELDS_QUERY, db: AsyncSession = Depends(get_read_db), authorization: Optional[str] = Header(None), token: Optional[str] = None):
+    """If cursor is provided, return keyset page dict {items,limit,next_cursor}.
+    If page and limit are provided, return paginated result dict {items,page,limit,total,pages,has_next,next_cursor}.
     Otherwise return plain list for backward compatibility.
+
+    With q, plain-list and page results are ordered by relevance; cursor pages
+    stay in id order since the cursor is keyed on task id. Without q the page
+    total comes from the user's maintained task counter instead of a count().
+    fields=id,title selects and returns only those columns (plus id).
+
+    Responses carry an ETag built from the user's tasks version; a matching
+    If-None-Match gets 304 after a single users-row lookup.
+
+    The serialized response is kept in the per-user response cache (app.cache)
+    until the user's next task write; a cache hit answers, or 304s, without
+    touching the database.
     """
     user = get_current_user(authorization, token)
-    query = db.query(Task).filter(Task.user_email == user)
+    columns = _select_columns(fields, user)
+    params = sorted((k, v) for k, v in request.query_params.multi_items() if k != "token")
+    cache_key, cached = await response_cache.lookup(user, params)
+    if cached:
+        etag, body = cached
+        headers = _listing_headers(etag)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    stamp = (await db.execute(select(User.id, User.task_count, User.tasks_version).where(User.email == user))).first()
+    user_id, task_count, version = stamp if stamp else (None, 0, 0)
+    etag = make_etag(user, version, params)
+    headers = _listing_headers(etag)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    payload = await _list_payload(db, user_id, columns, task_count, q, page, limit, cursor, include_total)
+    body = dumps(payload)
+    await response_cache.store(cache_key, etag, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+def _listing_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+async def _list_payload(db: AsyncSession, user_id: Optional[int], columns, task_count: int, q: Optional[str], page: Optional[int], limit: Optional[int], cursor: Optional[str], include_total: bool):
+    # plain column tuples turned into dicts: no ORM identity map, no reflective encoding
+    query = select(*columns).where(Task.user_id == user_id)
+    ranked = False
     if q:
-        query = query.filter(Task.title.ilike(f"%{q}%"))
-    total = query.count()
+        query, ranked = apply_search(query, q, user_id, db.bind.dialect.name, ranked=cursor is None)
+    if not ranked:
+        query = query.order_by(Task.id)
+
+    if cursor is not None:
+        # keyset pagination: seek past the last seen id instead of skipping rows
+        try:
+            last_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if limit is None or limit < 1:
+            limit = 10
+        if last_id is not None:
+            query = query.where(Task.id > last_id)
+        rows = await _fetch_dicts(db, query.limit(limit + 1))
+        items = rows[:limit]
+        next_cursor = encode_cursor(items[-1]["id"]) if len(rows) > limit else None
+        return {"items": items, "limit": limit, "next_cursor": next_cursor}
+
     if page is None or limit is None:
-        return query.all()
+        return await _fetch_dicts(db, query)
 
     # normalize page/limit
     if page < 1:
         page = 1
     if limit < 1:
         limit = 10
-    pages = ceil(total / limit) if total > 0 else 1
-    items = query.limit(limit).offset((page - 1) * limit).all()
-    return {"items": items, "page": page, "limit": limit, "total": total, "pages": pages}
+    total = pages = None
+    if include_total:
+        if q:
+            total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+        else:
+            total = task_count
+        pages = ceil(total / limit) if total > 0 else 1
+    # one extra row tells whether a next page exists without counting
+    rows = await _fetch_dicts(db, query.limit(limit + 1).offset((page - 1) * limit))
+    items = rows[:limit]
+    has_next = len(rows) > limit
+    # let offset clients switch to keyset navigation (only valid in id order)
+    next_cursor = encode_cursor(items[-1]["id"]) if has_next and not ranked else None
+    return {"items": items, "page": page, "limit": limit, "total": total, "pages": pages, "has_next": has_next, "next_cursor": next_cursor}
+
+def _ndjson_chunk(rows, keys) -> bytes:
+    return b"".join(dumps(row) + b"\n" for row in _row_dicts(rows, keys))
+
+def _csv_chunk(rows, header=None) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buf.getvalue()
+
+@router.get("/export")
+async def export_tasks(format: str = Query("ndjson", pattern="^(ndjson|csv)$"), q: Optional[str] = Query(None, description="Full-text search over title and description"), fields: Optional[str] = FIELDS_QUERY, authorization: Optional[str] = Header(None), token: Optional[str] = None):
+    """Stream all of the user's tasks as NDJSON or CSV, in id order.
+
+    Rows are read through a server-side cursor in EXPORT_BATCH_SIZE batches and
+    encoded one batch at a time, so memory stays flat however many tasks exist.
+    fields= limits the exported columns, as on GET /tasks/.
+    """
+    user = get_current_user(authorization, token)
+    columns = _select_columns(fields, user)
+    keys = [c.key for c in columns]
+
+    async def chunks():
+        # own session: it must live as long as the stream, not the endpoint call
+        async with read_sessionmaker(await write_marks.recent(user))() as db:
+            user_id = await db.scalar(select(User.id).where(User.email == user))
+            query = select(*columns).where(Task.user_id == user_id)
+            if q:
+                query, _ = apply_search(query, q, user_id, async_engine.dialect.name, ranked=False)
+            query = query.order_by(Task.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+            result = await db.stream(query)
+            if format == "csv":
+                yield _csv_chunk([], header=keys)
+            async for rows in result.partitions():
+                yield _csv_chunk(rows) if format == "csv" else _ndjson_chunk(rows, keys)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="tasks.{format}"'}
+    return StreamingResponse(chunks(), media_type=media_type, headers=headers)
+
+
+# user -> counters of the import currently running for that user (this process only)
+_import_progress: Dict[str, Dict[str, Any]] = {}
+
+@router.post("/import")
+async def import_tasks(request: Request, format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"), db: AsyncSession = Depends(get_async_write_db), authorization: Optional[str] = Header(None), token: Optional[str] = None):
+    """Import tasks from an NDJSON or CSV request body (e.g. curl --data-binary @tasks.csv).
+
+    The body is parsed as it arrives, rows are validated like POST /tasks/ and
+    written in IMPORT_BATCH_SIZE multi-row INSERTs, each committed on its own.
+    The format comes from ?format= or the Content-Type (text/csv), default NDJSON.
+    Progress can be polled on GET /tasks/import/progress while it runs.
+    Returns {rows, imported, failed, errors, errors_truncated}. A fatal error
+    (bad CSV header, invalid UTF-8) is a 400 whose detail has the same counters
+    plus "error"; rows up to the last committed batch are kept.
+    """
+    user = get_current_user(authorization, token)
+    if user in _import_progress:
+        raise HTTPException(status_code=409, detail="An import is already running for this user")
+    if format is None:
+        format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+
+    progress = {"rows": 0, "imported": 0, "failed": 0}
+    errors: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+
+    async def flush():
+        if not (await db.execute(_insert_tasks(user, batch))).all():
+            raise _unknown_user()
+        await _record_task_change(db, user, len(batch))
+        await db.commit()
+        await _task_change_committed(user, len(batch))
+        progress["imported"] += len(batch)
+        batch.clear()
+
+    def report():
+        return {**progress, "errors": errors, "errors_truncated": progress["failed"] > len(errors)}
+
+    _import_progress[user] = progress
+    try:
+        async for row, record in iter_records(request.stream(), format, IMPORT_MAX_RECORD_SIZE):
+            progress["rows"] = row
+            try:
+                if isinstance(record, str):
+                    raise ValueError(record)
+                task = TaskCreate(**record)
+            except (ValueError, TypeError) as e:
+                # pydantic's ValidationError is a ValueError
+                progress["failed"] += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    msg = "; ".join(err["msg"] for err in e.errors()) if isinstance(e, ValidationError) else str(e)
+                    errors.append({"row": row, "error": msg})
+                continue
+            batch.append({"title": task.title, "description": task.description or ""})
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
+        if batch:
+            await flush()
+    except ValueError as e:
+        # batches flushed so far stay committed: say how far the import got
+        raise HTTPException(status_code=400, detail={"error": str(e), **report()})
+    finally:
+        _import_progress.pop(user, None)
+    return report()
+
+@router.get("/import/progress")
+@query_budget(0)
+async def import_progress(authorization: Optional[str] = Header(None), token: Optional[str] = None):
+    """Counters of the caller's running import, or {"running": false}."""
+    user = get_current_user(authorization, token)
+    progress = _import_progress.get(user)
+    if progress is None:
+        return {"running": False}
+    return {"running": True, **progress}
+
+
+@router.get("/events")
+@query_budget(0)
+async def task_events(authorization: Optional[str] = Header(None), token: Optional[str] = None):
+    """Server-sent events feed of the caller's task changes, so clients can
+    patch their view instead of polling GET /tasks/.
+
+    Each event is ``data: <json>`` with a ``type``: ``created`` (with ``task``),
+    ``deleted`` (with ``id``) or ``reset`` (changes were missed or too many to
+    list: reload). The token goes in ?token= (EventSource cannot send headers);
+    the stream ends when it expires. Idle streams get a comment line every
+    EVENTS_KEEPALIVE_SECONDS.
+    """
+    user = get_current_user(authorization, token)
+    if broker is None:
+        raise HTTPException(status_code=404, detail="Change feed disabled")
+    expires = decode_token(_extract_token(authorization, token)).get("exp")
+
+    async def stream():
+        sub = broker.subscribe(user)
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                timeout = EVENTS_KEEPALIVE_SECONDS
+                if expires is not None:
+                    timeout = min(timeout, expires - time.time())
+                    if timeout <= 0:
+                        return
+                event = await sub.get(timeout)
+                yield b": keepalive\n\n" if event is None else b"data: " + event + b"\n\n"
+        finally:
+            broker.unsubscribe(sub)
+
+    # no-transform/X-Accel-Buffering: proxies must not buffer or compress the stream
+    headers = {"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"}
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
 
 
 @router.delete("/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(get_db), authorization: Optional[str] = Header(None), token: Optional[str] = None):
+@query_budget(2)
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_write_db), authorization: Optional[str] = Header(None), token: Optional[str] = None):
     user = get_current_user(authorization, token)
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    if task.user_email != user:
+    # ownership is part of the DELETE; only a miss needs a lookup to tell 403 from 404
+    deleted = await db.scalar(
+        delete(Task).where(Task.id == task_id, Task.user_id == owner_id(user)).returning(Task.id)
+    )
+    if deleted is None:
+        exists = await db.scalar(select(Task.id).where(Task.id == task_id))
+        await db.rollback()
+        if exists is None:
+            raise HTTPException(status_code=404, detail="Task not found")
         raise HTTPException(status_code=403, detail="Not allowed to delete this task")
-    db.delete(task)
-    db.commit()
+    await _record_task_change(db, user, -1)
+    await db.commit()
+    await _task_change_committed(user, -1, [{"type": "deleted", "id": task_id}])
     return {"detail": "deleted"}
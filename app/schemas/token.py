@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
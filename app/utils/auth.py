@@ -1,7 +1,13 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, UTC
-from jose import jwt
+from jose import jwt, ExpiredSignatureError
 from passlib.context import CryptContext
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, TOKEN_CACHE_SIZE
+from app.utils.metrics import jwt_decode_seconds
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -38,3 +44,87 @@ def create_token(data: dict):
     expire = datetime.now(UTC) + timedelta(minutes=_cfg.ACCESS_TOKEN_EXPIRE_MINUTES)
     data.update({"exp": int(expire.timestamp())})  # JWT spec uses Unix timestamp
     return jwt.encode(data, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def hash_refresh_token(token: str) -> str:
+    """Digest under which a refresh token is stored. Tokens are random, so sha256 is enough (no bcrypt)."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def create_refresh_token():
+    """Return (token, token_hash, expires_at) for a new opaque refresh token."""
+    import app.config as _cfg
+    token = secrets.token_urlsafe(32)
+    expires_at = int(time.time() + _cfg.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+    return token, hash_refresh_token(token), expires_at
+
+
+class TokenCache:
+    """LRU cache of already verified JWTs -> claims.
+
+    Bounded by ``maxsize`` entries and by each token's own ``exp``: a cached
+    token past its expiry is evicted and rejected exactly like jwt.decode
+    would reject it.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        with self._lock:
+            claims = self._entries.get(token)
+            if claims is None:
+                self.misses += 1
+                return None
+            exp = claims.get("exp")
+            # same rule as jose: expired once exp < now (whole seconds, no leeway)
+            if exp is not None and exp < int(time.time()):
+                del self._entries[token]
+                self.misses += 1
+                raise ExpiredSignatureError("Signature has expired.")
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: dict):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[token] = claims
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+
+def decode_token(token: str) -> dict:
+    """Return the verified claims of ``token``, skipping verification for cached tokens.
+
+    Raises jose's ExpiredSignatureError / JWTError like jwt.decode. The returned
+    dict is shared with the cache and must not be modified.
+    """
+    t0 = time.perf_counter()
+    claims = token_cache.get(token)
+    if claims is not None:
+        jwt_decode_seconds.observe(time.perf_counter() - t0, "hit")
+        return claims
+    # jwt.decode validates exp automatically
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    token_cache.put(token, claims)
+    jwt_decode_seconds.observe(time.perf_counter() - t0, "miss")
+    return claims
@@ -0,0 +1,20 @@
+import hashlib
+from typing import Optional
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag from the given parts (weak: the body may be re-encoded, e.g. compressed)."""
+    digest = hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value matches ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    wanted = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == wanted:
+            return True
+    return False
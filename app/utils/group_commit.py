@@ -0,0 +1,99 @@
+import asyncio
+import contextvars
+import weakref
+from typing import Any, Awaitable, Callable, List
+
+from app.utils.metrics import group_commit_batch_size
+
+
+class _LoopState:
+    __slots__ = ("pending", "full", "task")
+
+    def __init__(self):
+        self.pending = []  # [(item, future, arrival loop time)]
+        self.full = asyncio.Event()
+        self.task = None
+
+
+class GroupCommitFailed(Exception):
+    """Raised to each caller of a batch whose flush failed; the flush's
+    exception is the ``__cause__``."""
+
+
+class GroupCommitter:
+    """Gathers writes from concurrent requests and commits them together.
+
+    ``submit(item)`` queues an item and waits until ``flush`` (called with up to
+    ``max_batch`` items, one batch at a time) has committed it, then returns
+    that item's result. A batch goes out ``window`` seconds after its first item
+    arrives, or as soon as ``max_batch`` items are waiting; items arriving while
+    a batch is being flushed form the next one, which goes out as soon as that
+    flush ends if its window has run out meanwhile. ``flush`` returns one result
+    per item, in order; a result that is an exception is raised to that item's
+    caller only. If ``flush`` itself fails, every caller in the batch gets its
+    own GroupCommitFailed caused by the error.
+    """
+
+    def __init__(self, flush: Callable[[List[Any]], Awaitable[List[Any]]], window: float, max_batch: int):
+        self.flush = flush
+        self.window = window
+        self.max_batch = max(max_batch, 1)
+        # asyncio primitives are bound to their loop (tests run several)
+        self._states = weakref.WeakKeyDictionary()
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState()
+        return state
+
+    async def submit(self, item):
+        state = self._state()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        state.pending.append((item, future, loop.time()))
+        if len(state.pending) >= self.max_batch:
+            state.full.set()
+        if state.task is None:
+            # empty context: the batch's statements belong to no single request
+            state.task = loop.create_task(self._run(state), context=contextvars.Context())
+        return await future
+
+    async def _run(self, state: _LoopState):
+        try:
+            loop = asyncio.get_running_loop()
+            while state.pending:
+                # the window runs from the oldest waiting item's arrival
+                remaining = state.pending[0][2] + self.window - loop.time()
+                if len(state.pending) < self.max_batch and remaining > 0:
+                    try:
+                        await asyncio.wait_for(state.full.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                batch, state.pending = state.pending[:self.max_batch], state.pending[self.max_batch:]
+                if len(state.pending) < self.max_batch:
+                    state.full.clear()
+                await self._flush(batch)
+        finally:
+            state.task = None
+
+    async def _flush(self, batch):
+        group_commit_batch_size.observe(len(batch))
+        try:
+            results = await self.flush([item for item, _, _ in batch])
+        except Exception as e:
+            # one exception per caller: raising a shared instance in every
+            # waiting task would pile all their tracebacks onto it
+            results = []
+            for _ in batch:
+                failed = GroupCommitFailed(f"group commit failed: {e!r}")
+                failed.__cause__ = e
+                results.append(failed)
+        for (_, future, _), result in zip(batch, results):
+            if future.done():  # the request went away
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
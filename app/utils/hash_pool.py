@@ -0,0 +1,72 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.config import HASH_WORKERS, HASH_QUEUE_SIZE, HASH_RETRY_AFTER_SECONDS
+from app.utils.metrics import password_hash_seconds, password_hash_queue_seconds
+
+
+class HashPoolSaturated(Exception):
+    """Raised when the hash pool already has as much work as it will queue."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("password hashing is saturated, retry later")
+        self.retry_after = retry_after
+
+
+def _timed_call(fn, *args):
+    """Runs in the worker: return (seconds spent in fn, result)."""
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+
+class HashPool:
+    """Bounded process pool for bcrypt hash/verify calls.
+
+    Keeps password hashing off the event loop and off the shared threadpool,
+    spreads it over ``workers`` processes and rejects new work once
+    ``workers + queue_size`` calls are in flight, so a login burst fails
+    fast instead of stalling the rest of the API.
+    """
+
+    def __init__(self, workers: int, queue_size: int, retry_after: int):
+        self.workers = workers
+        self.capacity = max(workers, 1) + queue_size
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._executor = None
+
+    def start(self):
+        if self.workers > 0 and self._executor is None:
+            # spawn: forking a process that already runs threads is unsafe
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn, *args):
+        # only touched from the event loop thread, so a plain counter is enough
+        if self.in_flight >= self.capacity:
+            raise HashPoolSaturated(self.retry_after)
+        self.in_flight += 1
+        t0 = time.perf_counter()
+        try:
+            elapsed, result = await asyncio.get_running_loop().run_in_executor(self.start(), _timed_call, fn, *args)
+            op = fn.__name__
+            password_hash_seconds.observe(elapsed, op)
+            password_hash_queue_seconds.observe(max(time.perf_counter() - t0 - elapsed, 0.0), op)
+            return result
+        except BrokenProcessPool:
+            # a worker died; start a fresh pool on the next call
+            self._executor = None
+            raise
+        finally:
+            self.in_flight -= 1
+
+
+hash_pool = HashPool(HASH_WORKERS, HASH_QUEUE_SIZE, HASH_RETRY_AFTER_SECONDS)
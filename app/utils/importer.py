@@ -0,0 +1,122 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Optional, Tuple, Union
+
+from app.config import IMPORT_MAX_RECORD_SIZE
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line: int = IMPORT_MAX_RECORD_SIZE) -> AsyncIterator[Optional[str]]:
+    """Decode a UTF-8 byte stream into lines without buffering more than one partial line.
+
+    A line longer than ``max_line`` characters is dropped up to its newline and
+    yielded as None, so the caller can report it and carry on with the next one.
+    Raises ValueError for bytes that are not UTF-8.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    skipping = False  # inside an overlong line, already reported
+    async for chunk in chunks:
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            if skipping:
+                skipping = False  # the rest of the overlong line
+            elif len(line) > max_line:
+                yield None
+            else:
+                yield line.rstrip("\r")
+        if skipping:
+            tail = ""
+        elif len(tail) > max_line:
+            yield None
+            tail, skipping = "", True
+    tail += decoder.decode(b"", final=True)
+    if tail and not skipping:
+        yield None if len(tail) > max_line else tail.rstrip("\r")
+
+
+def _ends_in_quotes(line: str, in_quotes: bool) -> bool:
+    """CSV quote state at the end of ``line`` (RFC 4180, as csv.reader parses it).
+
+    Only a quote at the start of a field opens a quoted field, which may span
+    lines; anywhere else (``27" monitor``) it is a literal character.
+    """
+    if not in_quotes and '"' not in line:
+        return False
+    at_field_start = not in_quotes
+    i = 0
+    while i < len(line):
+        c = line[i]
+        if in_quotes:
+            if c == '"':
+                if line[i + 1:i + 2] == '"':  # escaped quote
+                    i += 1
+                else:
+                    in_quotes = False
+        elif c == ",":
+            at_field_start = True
+            i += 1
+            continue
+        elif c == '"' and at_field_start:
+            in_quotes = True
+        at_field_start = False
+        i += 1
+    return in_quotes
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str, max_record: int = IMPORT_MAX_RECORD_SIZE) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """Yield (row_number, record) for each NDJSON line or CSV record in the stream.
+
+    record is a dict of fields, or an error message string when the row cannot
+    be parsed. Blank lines are skipped. CSV input needs a header row; quoted
+    fields may span lines. A line, or a CSV record still inside a quoted
+    field, longer than ``max_record`` characters is reported as an error and
+    parsing resumes on the next line. Raises ValueError for an unusable CSV
+    header or bytes that are not UTF-8.
+    """
+    row = 0
+    header = None
+    pending = ""
+    in_quotes = False
+    async for line in iter_lines(chunks, max_record):
+        if line is None:
+            if fmt == "csv" and header is None:
+                raise ValueError(f"CSV header longer than {max_record} characters")
+            row += 1
+            yield row, f"line longer than {max_record} characters"
+            pending, in_quotes = "", False
+            continue
+        if fmt == "csv":
+            # a record ends at the first line break outside a quoted field
+            pending = f"{pending}\n{line}" if in_quotes else line
+            in_quotes = _ends_in_quotes(line, in_quotes)
+            if in_quotes:
+                if len(pending) > max_record:
+                    row += 1
+                    yield row, f"record longer than {max_record} characters (unterminated quoted field?)"
+                    pending, in_quotes = "", False
+                continue
+            line, pending = pending, ""
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            fields = next(csv.reader([line]))
+            if header is None:
+                header = [h.strip().lower() for h in fields]
+                if "title" not in header:
+                    raise ValueError("CSV header must include a 'title' column")
+                continue
+            row += 1
+            yield row, dict(zip(header, fields))
+            continue
+
+        row += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, f"invalid JSON: {e}"
+            continue
+        yield row, record if isinstance(record, dict) else "each line must be a JSON object"
+    if in_quotes:
+        yield row + 1, "unterminated quoted field"
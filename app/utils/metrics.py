@@ -0,0 +1,251 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import event
+from starlette.routing import Mount
+
+# Minimal Prometheus text-format (0.0.4) metrics: counters and histograms with
+# labels, plus helpers to render gauges collected at scrape time.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; spans sub-millisecond cache hits up to slow bcrypt/DB calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (non-cumulative, last = +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def counter_lines(name: str, help: str, samples: Iterable[Tuple[Dict[str, object], float]]) -> List[str]:
+    """Render a counter kept elsewhere (e.g. a cache's hit count) from
+    (labels, value) pairs read at scrape time; ``name`` should end in _total."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+    return lines
+
+
+def gauge_lines(name: str, help: str, samples: Iterable[Tuple[Dict[str, object], float]]) -> List[str]:
+    """Render a gauge from (labels, value) pairs read at scrape time."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+    return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> List[str]:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return lines
+
+
+registry = Registry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by method, route template and status.", ["method", "route", "status"]))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency (until the last body chunk) by route template.", ["method", "route"]))
+password_hash_seconds = registry.register(Histogram(
+    "password_hash_seconds", "bcrypt call time inside the hash worker.", ["op"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5)))
+password_hash_queue_seconds = registry.register(Histogram(
+    "password_hash_queue_seconds", "Time bcrypt calls waited for a hash worker (incl. IPC).", ["op"]))
+jwt_decode_seconds = registry.register(Histogram(
+    "jwt_decode_seconds", "Access token verification time; cache=hit skips the signature check.", ["cache"],
+    buckets=(0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005)))
+db_pool_checkout_wait_seconds = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection (incl. connecting).", ["engine"]))
+db_pool_connect_seconds = registry.register(Histogram(
+    "db_pool_connect_seconds", "Time to open a new DB connection for the pool.", ["engine"]))
+db_pool_hold_seconds = registry.register(Histogram(
+    "db_pool_hold_seconds", "Time pooled DB connections stay checked out (checkout to checkin).", ["engine"]))
+db_commits_total = registry.register(Counter(
+    "db_commits_total", "Transactions committed.", ["engine"]))
+group_commit_batch_size = registry.register(Histogram(
+    "group_commit_batch_size", "Task creations committed per group commit.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)))
+events_dropped_total = registry.register(Counter(
+    "events_dropped_total", "Change feed events dropped because a client fell behind (replaced by a reset)."))
+
+
+def timed_pool(base, name: str):
+    """Subclass of the pool class ``base`` (pass it as ``poolclass=``) timing
+    every checkout, Pool.connect(), into db_pool_checkout_wait_seconds.
+
+    recreate() (engine.dispose()) builds the new pool from the same class, so
+    the timing survives it.
+    """
+
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            return base.connect(self)
+        finally:
+            db_pool_checkout_wait_seconds.observe(time.perf_counter() - t0, name)
+
+    return type(f"Timed{base.__name__}", (base,), {"connect": connect})
+
+
+def instrument_pool(engine, name: str):
+    """Time new connections into db_pool_connect_seconds and checkout-to-checkin
+    spans into db_pool_hold_seconds for ``engine``'s pool (public pool events,
+    kept across dispose()/recreate()). Checkout waits need timed_pool().
+    """
+
+    @event.listens_for(engine, "do_connect")
+    def _connect_start(dialect, connection_record, cargs, cparams):
+        connection_record.info["connect_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "connect")
+    def _connected(dbapi_connection, connection_record):
+        t0 = connection_record.info.pop("connect_start", None)
+        if t0 is not None:
+            db_pool_connect_seconds.observe(time.perf_counter() - t0, name)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checkout_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        t0 = connection_record.info.pop("checkout_start", None)
+        if t0 is not None:
+            db_pool_hold_seconds.observe(time.perf_counter() - t0, name)
+
+
+def count_commits(engine, name: str):
+    """Count ``engine``'s commits into db_commits_total (fsyncs, on most databases)."""
+    event.listen(engine, "commit", lambda conn: db_commits_total.inc(name))
+
+
+def pool_samples(pools: Dict[str, object]) -> List[str]:
+    """Gauges for pool size / checked out / overflow, where the pool class has them."""
+    lines = []
+    for metric, attr, help in (
+        ("db_pool_size", "size", "Configured pool size."),
+        ("db_pool_checked_out", "checkedout", "Connections currently checked out."),
+        ("db_pool_overflow", "overflow", "Connections open beyond the pool size (negative: unused capacity)."),
+    ):
+        samples = [({"engine": name}, getattr(pool, attr)()) for name, pool in pools.items() if hasattr(pool, attr)]
+        lines.extend(gauge_lines(metric, help, samples))
+    return lines
+
+
+def _route_label(scope) -> str:
+    # the route template keeps label cardinality bounded (/tasks/{task_id}, not /tasks/42)
+    route = scope.get("route")
+    if route is not None:
+        return route.path + "/*" if isinstance(route, Mount) else route.path
+    if "endpoint" in scope:
+        # a mounted app (the static frontend), labelled by its mount prefix
+        return scope.get("root_path", "") + "/*"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording http_requests_total and http_request_duration_seconds."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = _route_label(scope)
+            http_requests_total.inc(scope["method"], route, str(status))
+            http_request_duration_seconds.observe(time.perf_counter() - t0, scope["method"], route)
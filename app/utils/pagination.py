@@ -0,0 +1,28 @@
+import base64
+import json
+from typing import Optional
+
+
+def encode_cursor(last_id: int) -> str:
+    """Build an opaque cursor pointing just after the task with id ``last_id``."""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[int]:
+    """Return the last seen task id encoded in ``cursor``.
+
+    An empty cursor means "start from the beginning" and returns None.
+    Raises ValueError if the cursor is malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = data["id"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError("invalid cursor")
+    return last_id
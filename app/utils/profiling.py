@@ -0,0 +1,121 @@
+import contextvars
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger("app.sql")
+
+# Per-request SQL accounting. The middleware puts a QueryStats in a context
+# variable; engine events (which run in the request's context, also through
+# SQLAlchemy's async greenlets) add every statement to it.
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more statements than its route's budget (strict mode)."""
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+
+
+_current: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def query_budget(max_queries: int):
+    """Declare the most statements a route may run per request, e.g.
+
+        @router.get("/")
+        @query_budget(3)
+        async def list_tasks(...): ...
+
+    Requests over budget are logged, or fail in strict mode (QUERY_BUDGET_STRICT).
+    """
+    def decorate(fn):
+        fn.__query_budget__ = max_queries
+        return fn
+    return decorate
+
+
+def instrument_engine(engine, slow_query_ms: float):
+    """Attribute ``engine``'s statements to the current request and log slow ones."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        _record(conn, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(ctx):
+        # a statement the database rejected (e.g. a unique violation) still cost a round trip
+        if ctx.execution_context is not None and ctx.connection is not None and ctx.connection.info.get("query_start"):
+            _record(ctx.connection, ctx.statement)
+
+    def _record(conn, statement):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        # transaction control is explicit on SQLite only; leave it out so
+        # counts (and budgets) are the same on every database
+        if statement.startswith("BEGIN"):
+            return
+        stats = _current.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+            stats.statements.append(statement)
+        if slow_query_ms and elapsed * 1000 >= slow_query_ms:
+            logger.warning("slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:1000])
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware: counts each request's statements and DB time, reports them
+    in a ``Server-Timing: db;dur=<ms>;desc="<n> queries"`` header and checks the
+    route's query budget before the response starts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                self._check_budget(scope, stats)
+                timing = f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries"'
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+
+    def _check_budget(self, scope, stats: QueryStats):
+        budget = getattr(scope.get("endpoint"), "__query_budget__", None)
+        if budget is None or stats.count <= budget:
+            return
+        route = getattr(scope.get("route"), "path", scope["path"])
+        msg = f"{scope['method']} {route} ran {stats.count} queries (budget {budget}):\n" + "\n".join(
+            f"  {i}. {' '.join(s.split())[:200]}" for i, s in enumerate(stats.statements, 1)
+        )
+        # read at call time so tests can switch strict mode on
+        import app.config as _cfg
+        if _cfg.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(msg)
+        logger.warning(msg)
@@ -0,0 +1,56 @@
+import re
+from typing import List, Tuple
+
+from sqlalchemy import Float, Integer, func, literal_column, or_, text
+
+from app.models.task import Task, SEARCH_VECTOR_SQL
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(q: str) -> List[str]:
+    """Split a user search string into plain word tokens (punctuation is dropped)."""
+    return [t.lower() for t in _TOKEN_RE.findall(q or "")]
+
+
+def apply_search(query, q: str, owner: int, dialect: str, ranked: bool = True) -> Tuple[object, bool]:
+    """Filter ``query`` (a Task query of user id ``owner``'s rows) by ``q`` using the dialect's search index.
+
+    Every term must match as a word prefix in the title or description.
+    When ``ranked`` is true the query is ordered by relevance (best first),
+    otherwise ordering is left to the caller. Returns (query, was_ranked).
+    Falls back to a substring match when ``q`` has no word characters or the
+    dialect has no search index.
+    """
+    terms = search_terms(q)
+    if terms and dialect == "sqlite":
+        # terms must hit title/description; the owner phrase narrows to the user's rows
+        words = " AND ".join(f'"{t}"*' for t in terms)
+        match = f'{{title description}} : ({words}) AND owner : "{owner}"'
+        # bm25 weights: title hits count 10x description hits; lower is better.
+        # MATERIALIZED runs the MATCH once: as a plain subquery SQLite flattens
+        # it and, walking the user's rows on ix_tasks_user_id_id, re-runs the
+        # full-text query once per task (100x slower on a 1000-task user).
+        fts = (
+            text("SELECT rowid AS id, bm25(tasks_fts, 10.0, 1.0, 0.0) AS rank FROM tasks_fts WHERE tasks_fts MATCH :match")
+            .bindparams(match=match)
+            .columns(id=Integer, rank=Float)
+            .cte("fts")
+            .prefix_with("MATERIALIZED")
+        )
+        query = query.join(fts, fts.c.id == Task.id)
+        if ranked:
+            query = query.order_by(fts.c.rank, Task.id)
+        return query, ranked
+
+    if terms and dialect == "postgresql":
+        # literal expression so the planner matches it against ix_tasks_search
+        vector = literal_column(SEARCH_VECTOR_SQL)
+        tsquery = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in terms))
+        query = query.filter(vector.op("@@")(tsquery))
+        if ranked:
+            query = query.order_by(func.ts_rank(vector, tsquery).desc(), Task.id)
+        return query, ranked
+
+    pattern = f"%{q}%"
+    return query.filter(or_(Task.title.ilike(pattern), Task.description.ilike(pattern))), False
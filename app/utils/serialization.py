@@ -0,0 +1,30 @@
+import json
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - listed in requirements; stdlib fallback
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode plain JSON data (dicts, lists, str, int, float, None) to compact UTF-8 bytes.
+
+    Uses orjson when installed; the stdlib fallback produces the same bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSONResponse for content that is already plain data (e.g. rows as dicts):
+    skips jsonable_encoder and encodes with dumps().
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
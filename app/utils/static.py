@@ -0,0 +1,74 @@
+import hashlib
+import os
+import re
+from mimetypes import guess_type
+from typing import List
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# precompressed variants written next to each file, best first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# "style.1a2b3c4d5e.css": content-hashed by app.build_frontend, never changes
+_HASHED = re.compile(r"\.[0-9a-f]{10}\.[^./]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def hashed_name(name: str, content: bytes) -> str:
+    """``name`` with a hash of ``content`` before the extension (style.css -> style.<hash>.css)."""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{ext}"
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Codings from an Accept-Encoding header, without those refused with q=0."""
+    codings = []
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if params and float(q) == 0:
+                continue
+        except ValueError:
+            continue
+        if coding:
+            codings.append(coding)
+    return codings
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves ``<file>.br`` / ``<file>.gz`` when the client
+    accepts that encoding, and sets cache headers by file name.
+
+    Content-hashed files are cached for a year as immutable; everything else
+    (HTML entry points, unhashed names) must be revalidated on every use
+    (ETag / If-None-Match, answered with 304). Without precompressed variants
+    it behaves like StaticFiles plus those headers.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        path, encoding, variants = full_path, None, False
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        for coding, ext in ENCODINGS:
+            try:
+                variant_stat = os.stat(f"{full_path}{ext}")
+            except OSError:
+                continue
+            variants = True
+            if encoding is None and coding in accepted:
+                path, stat_result, encoding = f"{full_path}{ext}", variant_stat, coding
+
+        media_type = guess_type(str(full_path))[0] or "text/plain"
+        response = FileResponse(path, status_code=status_code, stat_result=stat_result, media_type=media_type)
+        if encoding:
+            response.headers["content-encoding"] = encoding
+        if variants:
+            response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = IMMUTABLE if _HASHED.search(str(full_path)) else "no-cache"
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
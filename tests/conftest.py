@@ -0,0 +1,10 @@
+import pytest
+
+from app.database import engine
+from app.migrations import migrate
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _migrated_database():
+    # the app no longer creates its schema at import time
+    migrate(engine, log=lambda msg: None)
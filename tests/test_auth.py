@@ -2,6 +2,7 @@ import uuid
 from fastapi.testclient import TestClient
 from app.main import app
 from app.database import SessionLocal
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
 
 client = TestClient(app)
@@ -39,6 +40,23 @@ def test_register_and_login_success():
     _cleanup_user(email)
 
 
+def test_register_duplicate_email_skips_hashing(monkeypatch):
+    import app.routers.auth as auth_router
+
+    email = f"test_{uuid.uuid4().hex}@example.com"
+    try:
+        assert client.post("/auth/register", json={"email": email, "password": "pw"}).status_code == 200
+        hashed = []
+        monkeypatch.setattr(auth_router, "hash_password", lambda pw: hashed.append(pw))
+        r = client.post("/auth/register", json={"email": email, "password": "other"})
+        assert r.status_code == 400 and r.json()["detail"] == "Email already exists"
+        # the existence check is the only statement, and no bcrypt hash is spent
+        assert r.headers["server-timing"].endswith('desc="1 queries"')
+        assert hashed == []
+    finally:
+        _cleanup_user(email)
+
+
 def test_register_password_too_long():
     email = f"test_{uuid.uuid4().hex}@example.com"
     password = "a" * 100  # 100 bytes > bcrypt 72
@@ -65,3 +83,103 @@ def test_login_with_too_long_password_fails():
 
     # cleanup
     _cleanup_user(email)
+
+
+def test_login_fails_fast_when_hash_pool_is_saturated(monkeypatch):
+    from app.utils.hash_pool import hash_pool
+
+    email = f"test_{uuid.uuid4().hex}@example.com"
+    password = "safepassword"
+    r = client.post("/auth/register", json={"email": email, "password": password})
+    assert r.status_code == 200
+
+    monkeypatch.setattr(hash_pool, "capacity", 0)
+    r2 = client.post("/auth/login", json={"email": email, "password": password})
+    assert r2.status_code == 503
+    assert r2.headers["retry-after"] == str(hash_pool.retry_after)
+
+    # cleanup
+    _cleanup_user(email)
+
+
+def test_verified_tokens_are_cached_until_exp():
+    import time
+    import pytest
+    from jose import ExpiredSignatureError
+    from app.utils.auth import token_cache, TokenCache
+
+    email = f"test_{uuid.uuid4().hex}@example.com"
+    r = client.post("/auth/register", json={"email": email, "password": "pw"})
+    assert r.status_code == 200
+    token = client.post("/auth/login", json={"email": email, "password": "pw"}).json()["token"]
+
+    before = token_cache.stats()
+    assert client.get(f"/tasks/?token={token}").status_code == 200
+    assert client.get(f"/tasks/?token={token}").status_code == 200
+    after = token_cache.stats()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+    # a cached entry is still rejected once its exp has passed
+    cache = TokenCache(maxsize=2)
+    cache.put("tok", {"sub": email, "exp": int(time.time()) - 1})
+    with pytest.raises(ExpiredSignatureError):
+        cache.get("tok")
+    assert cache.stats()["size"] == 0
+
+    # bounded by size (least recently used goes first)
+    for name in ("a", "b", "c"):
+        cache.put(name, {"sub": name})
+    assert cache.get("a") is None and cache.get("c") == {"sub": "c"}
+
+    _cleanup_user(email)
+
+
+def test_refresh_token_rotation_and_revocation():
+    email = f"test_{uuid.uuid4().hex}@example.com"
+    r = client.post("/auth/register", json={"email": email, "password": "pw"})
+    assert r.status_code == 200
+    r = client.post("/auth/login", json={"email": email, "password": "pw"})
+    first = r.json()["refresh_token"]
+
+    # refresh issues a working access token and rotates the refresh token
+    r = client.post("/auth/refresh", json={"refresh_token": first})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["refresh_token"] != first
+    assert client.get(f"/tasks/?token={data['token']}").status_code == 200
+
+    # replaying the rotated token is rejected and revokes the newer one too
+    r = client.post("/auth/refresh", json={"refresh_token": first})
+    assert r.status_code == 401
+    r = client.post("/auth/refresh", json={"refresh_token": data["refresh_token"]})
+    assert r.status_code == 401
+
+    # logout revokes a token; replaying it is not taken for theft
+    second = client.post("/auth/login", json={"email": email, "password": "pw"}).json()["refresh_token"]
+    third = client.post("/auth/login", json={"email": email, "password": "pw"}).json()["refresh_token"]
+    assert client.post("/auth/logout", json={"refresh_token": second}).status_code == 200
+    assert client.post("/auth/refresh", json={"refresh_token": second}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": third}).status_code == 200
+
+    assert client.post("/auth/refresh", json={"refresh_token": "bogus"}).status_code == 401
+
+    _cleanup_user(email)
+
+
+def test_expired_refresh_tokens_are_purged_on_login():
+    email = f"test_{uuid.uuid4().hex}@example.com"
+    client.post("/auth/register", json={"email": email, "password": "pw"})
+    try:
+        client.post("/auth/login", json={"email": email, "password": "pw"})
+        db = SessionLocal()
+        try:
+            user_id = db.query(User.id).filter(User.email == email).scalar()
+            db.query(RefreshToken).filter(RefreshToken.user_id == user_id).update({"expires_at": 0})
+            db.commit()
+            client.post("/auth/login", json={"email": email, "password": "pw"})
+            assert [t.expires_at > 0 for t in db.query(RefreshToken).filter(RefreshToken.user_id == user_id)] == [True]
+        finally:
+            db.close()
+    finally:
+        _cleanup_user(email)
@@ -0,0 +1,187 @@
+import asyncio
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import cache
+from app.cache import response_cache, MemoryCache, RedisCache
+from app.database import async_engine
+from app.main import app
+from test_tasks import _cleanup_user, _login_new_user
+
+client = TestClient(app)
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol for RedisCache (GET, SET [PX ms] [NX], INFO)
+    and RedisBroker (PUBLISH, PSUBSCRIBE with a trailing * pattern)."""
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            n = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(n + 2)[:-2])
+        return args
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            args = self._read_command()
+            if args is None:
+                with self.server.lock:
+                    self.server.subscribers[:] = [(p, h) for p, h in self.server.subscribers if h is not self]
+                return
+            cmd = args[0].upper()
+            if cmd == b"GET":
+                value, expires = data.get(args[1], (None, None))
+                if value is None or (expires and expires < time.monotonic()):
+                    self.wfile.write(b"$-1\r\n")
+                else:
+                    self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+            elif cmd == b"SET":
+                opts = [a.upper() for a in args[3:]]
+                if b"NX" in opts and args[1] in data:
+                    self.wfile.write(b"$-1\r\n")
+                    continue
+                expires = time.monotonic() + int(opts[opts.index(b"PX") + 1]) / 1000 if b"PX" in opts else None
+                data[args[1]] = (args[2], expires)
+                self.wfile.write(b"+OK\r\n")
+            elif cmd == b"PSUBSCRIBE":
+                pattern = args[1]
+                self._send(b"*3\r\n$10\r\npsubscribe\r\n$%d\r\n%s\r\n:1\r\n" % (len(pattern), pattern))
+                self.server.subscribers.append((pattern, self))
+            elif cmd == b"PUBLISH":
+                channel, message = args[1], args[2]
+                receivers = [(p, h) for p, h in self.server.subscribers if channel.startswith(p.rstrip(b"*"))]
+                for pattern, handler in receivers:
+                    handler._send(b"*4\r\n$8\r\npmessage\r\n" + b"".join(
+                        b"$%d\r\n%s\r\n" % (len(part), part) for part in (pattern, channel, message)))
+                self._send(b":%d\r\n" % len(receivers))
+            elif cmd == b"INFO":
+                info = b"# Memory\r\nused_memory:%d\r\n" % sum(len(v) for v, _ in data.values())
+                self.wfile.write(b"$%d\r\n%s\r\n" % (len(info), info))
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+    def _send(self, data: bytes):
+        # subscribers are written to from the publisher's thread
+        with self.server.lock:
+            self.wfile.write(data)
+
+
+def _start_resp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RespHandler)
+    server.daemon_threads = True
+    server.data = {}
+    server.subscribers = []
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _count_queries():
+    counter = {"n": 0}
+
+    def on_execute(*args):
+        counter["n"] += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    return counter, lambda: event.remove(async_engine.sync_engine, "before_cursor_execute", on_execute)
+
+
+def _exercise_listing_cache():
+    email, token = _login_new_user()
+    counter, stop = _count_queries()
+    try:
+        client.post(f"/tasks/?token={token}", json={"title": "first"})
+        params = {"token": token, "page": 1, "limit": 5}
+        miss = client.get("/tasks/", params=params)
+        assert miss.status_code == 200
+
+        before, hits = counter["n"], response_cache.hits
+        hit = client.get("/tasks/", params=params)
+        assert hit.content == miss.content and hit.headers["etag"] == miss.headers["etag"]
+        assert client.get("/tasks/", params=params, headers={"If-None-Match": hit.headers["etag"]}).status_code == 304
+        assert counter["n"] == before and response_cache.hits == hits + 2
+
+        # a write makes every cached listing of that user unreachable
+        client.post(f"/tasks/?token={token}", json={"title": "second"})
+        r = client.get("/tasks/", params=params)
+        assert r.json()["total"] == 2 and r.headers["etag"] != hit.headers["etag"]
+        client.request("DELETE", f"/tasks/bulk?token={token}", json=[t["id"] for t in r.json()["items"]])
+        assert client.get("/tasks/", params=params).json()["items"] == []
+    finally:
+        stop()
+        _cleanup_user(email)
+
+
+def test_memory_cache_serves_hits_without_queries(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", MemoryCache(1 << 20))
+    _exercise_listing_cache()
+    stats = asyncio.run(response_cache.stats())
+    assert stats["backend"] == "MemoryCache" and 0 < stats["hit_ratio"] < 1 and stats["bytes"] > 0
+
+
+def test_memory_cache_evicts_by_size():
+    async def run():
+        cache = MemoryCache(100)
+        await cache.set("a", b"x" * 40)
+        await cache.set("b", b"x" * 40)
+        await cache.get("a")
+        await cache.set("c", b"x" * 40)
+        return [await cache.get(k) is not None for k in "abc"], await cache.memory_stats()
+
+    present, stats = asyncio.run(run())
+    assert present == [True, False, True]
+    assert stats["entries"] == 2 and stats["bytes"] <= 100
+
+
+def test_per_process_cache_is_refused_with_several_workers(monkeypatch):
+    monkeypatch.setattr(cache, "WEB_CONCURRENCY", 4)
+    with pytest.raises(RuntimeError):
+        cache._make_backend("memory")
+    # read-your-writes marks must be shared as well
+    with pytest.raises(RuntimeError):
+        cache._make_write_marks_backend(None)
+    redis = RedisCache("redis://localhost:6379/0")
+    assert cache._make_write_marks_backend(redis) is redis
+    assert cache._make_backend("none") is None
+
+    monkeypatch.setattr(cache, "WEB_CONCURRENCY", 1)
+    assert isinstance(cache._make_write_marks_backend(None), MemoryCache)
+
+
+def test_redis_protocol_backend(monkeypatch):
+    server = _start_resp_server()
+    try:
+        host, port = server.server_address
+        monkeypatch.setattr(response_cache, "backend", RedisCache(f"redis://{host}:{port}/0"))
+        _exercise_listing_cache()
+        assert any(k.startswith(b"tm:tasks:") for k in server.data)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_unreachable_cache_degrades_to_database(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    monkeypatch.setattr(response_cache, "backend", RedisCache(f"redis://127.0.0.1:{port}/0", timeout=0.2))
+    errors = response_cache.errors
+    email, token = _login_new_user()
+    try:
+        client.post(f"/tasks/?token={token}", json={"title": "still works"})
+        r = client.get(f"/tasks/?token={token}")
+        assert r.status_code == 200 and [t["title"] for t in r.json()] == ["still works"]
+        assert response_cache.errors > errors
+    finally:
+        _cleanup_user(email)
@@ -0,0 +1,122 @@
+import asyncio
+
+import httpx
+import orjson
+
+from app.events import RESET, MemoryBroker, RedisBroker, broker
+from app.main import app
+from app.utils.metrics import events_dropped_total
+from test_cache import _start_resp_server
+from test_tasks import _cleanup_user, _login_new_user
+
+
+def test_slow_subscriber_gets_reset_instead_of_backlog():
+    async def run():
+        local = MemoryBroker(queue_size=3)
+        sub = local.subscribe("a@example.com")
+        other = local.subscribe("b@example.com")
+        await local.publish("a@example.com", b'{"n":1}\n{"n":2}')
+        first = await sub.get(0)
+        for n in range(3, 8):
+            await local.publish("a@example.com", b'{"n":%d}' % n)
+        rest = [await sub.get(0) for _ in range(sub.queue.qsize())]
+        local.unsubscribe(sub)
+        return first, rest, await other.get(0), local.stats()
+
+    dropped = events_dropped_total.value()
+    first, rest, other, stats = asyncio.run(run())
+    assert first == b'{"n":1}'
+    # 2..4 filled the queue; 5 overflowed it, later events follow the reset
+    assert rest == [RESET, b'{"n":6}', b'{"n":7}']
+    assert events_dropped_total.value() - dropped == 3
+    assert other is None and stats == {"subscribers": 1}
+
+
+async def _read_events(stream: asyncio.Queue, n: int):
+    """Next ``n`` data events from raw ASGI body chunks of an SSE response."""
+    events, buffer = [], b""
+    while len(events) < n:
+        message = await asyncio.wait_for(stream.get(), 5)
+        buffer += message.get("body", b"")
+        while b"\n\n" in buffer:
+            frame, buffer = buffer.split(b"\n\n", 1)
+            if frame.startswith(b"data: "):
+                events.append(orjson.loads(frame[len(b"data: "):]))
+    return events
+
+
+def test_feed_pushes_own_creates_and_deletes_only():
+    (email, token), (other_email, other_token) = _login_new_user(), _login_new_user()
+
+    async def run():
+        sent, disconnect = asyncio.Queue(), asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": "/tasks/events", "raw_path": b"/tasks/events", "query_string": f"token={token}".encode(),
+            "headers": [(b"host", b"test")], "client": ("test", 1), "server": ("test", 80), "root_path": "",
+        }
+        feed = asyncio.create_task(app(scope, receive, sent.put))
+        start = await asyncio.wait_for(sent.get(), 5)
+        assert start["status"] == 200 and (b"content-type", b"text/event-stream; charset=utf-8") in start["headers"]
+        while broker.stats()["subscribers"] == 0:
+            await asyncio.sleep(0.01)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            mine = {"Authorization": f"Bearer {token}"}
+            await client.post("/tasks/", json={"title": "other's"}, headers={"Authorization": f"Bearer {other_token}"})
+            created = (await client.post("/tasks/", json={"title": "mine"}, headers=mine)).json()
+            await client.delete(f"/tasks/{created['id']}", headers=mine)
+            bulk = (await client.post("/tasks/bulk", json=[{"title": "x"}, {"title": "y"}], headers=mine)).json()
+            events = await _read_events(sent, 4)
+
+        disconnect.set()
+        await asyncio.wait_for(feed, 5)
+        return created, bulk, events, broker.stats()["subscribers"]
+
+    try:
+        created, bulk, events, subscribers = asyncio.run(run())
+        assert events[0] == {"type": "created", "task": created}
+        assert events[1] == {"type": "deleted", "id": created["id"]}
+        assert events[2:] == [{"type": "created", "task": r["task"]} for r in bulk["results"]]
+        assert subscribers == 0
+    finally:
+        _cleanup_user(email)
+        _cleanup_user(other_email)
+
+
+def test_feed_requires_token():
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return (await client.get("/tasks/events", params={"token": "nope"})).status_code
+
+    assert asyncio.run(run()) == 401
+
+
+def test_redis_broker_fans_out_between_workers():
+    server = _start_resp_server()
+    host, port = server.server_address
+
+    async def run():
+        # two brokers on one server stand in for two worker processes
+        worker_a = RedisBroker(f"redis://{host}:{port}/0", queue_size=10)
+        worker_b = RedisBroker(f"redis://{host}:{port}/0", queue_size=10)
+        sub = worker_a.subscribe("a@example.com")
+        other = worker_a.subscribe("b@example.com")
+        while not server.subscribers:
+            await asyncio.sleep(0.01)
+        await worker_b.publish("a@example.com", b'{"n":1}\n{"n":2}')
+        events = [await sub.get(5), await sub.get(5)]
+        worker_a._listener.cancel()
+        return events, await other.get(0)
+
+    try:
+        events, other = asyncio.run(run())
+        assert events == [b'{"n":1}', b'{"n":2}'] and other is None
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+
+from app.main import app
+from app.routers import tasks as tasks_router
+from app.utils.group_commit import GroupCommitFailed, GroupCommitter
+from app.utils.metrics import db_commits_total
+from test_tasks import _cleanup_user, _login_new_user
+
+
+def test_batches_by_window_and_size():
+    batches = []
+
+    async def flush(items):
+        batches.append(list(items))
+        return [ValueError("bad") if i == 7 else i * 10 for i in items]
+
+    async def run():
+        committer = GroupCommitter(flush, window=0.05, max_batch=4)
+        return await asyncio.gather(*(committer.submit(i) for i in range(10)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert results[:7] == [0, 10, 20, 30, 40, 50, 60] and isinstance(results[7], ValueError)
+
+
+def test_failed_flush_raises_one_exception_per_caller():
+    async def flush(items):
+        raise RuntimeError("disk full")
+
+    async def run():
+        committer = GroupCommitter(flush, window=0.01, max_batch=4)
+        return await asyncio.gather(*(committer.submit(i) for i in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert all(isinstance(e, GroupCommitFailed) and str(e.__cause__) == "disk full" for e in errors)
+    assert len({id(e) for e in errors}) == 3
+
+
+def test_window_counts_time_spent_waiting_for_a_flush():
+    async def flush(items):
+        await asyncio.sleep(0.3)
+        return items
+
+    async def run():
+        committer = GroupCommitter(flush, window=0.2, max_batch=100)
+        first = asyncio.ensure_future(committer.submit("a"))
+        await asyncio.sleep(0.25)  # the first batch is being flushed
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        await committer.submit("b")
+        await first
+        return loop.time() - t0
+
+    # "b"'s window ran out during the first flush: its batch starts right after
+    # it (~0.55 s in total) instead of a full window later (~0.75 s)
+    assert asyncio.run(run()) < 0.65
+
+
+def test_concurrent_creations_share_commits(monkeypatch):
+    monkeypatch.setattr(tasks_router, "TASK_GROUP_COMMIT", True)
+    users = [_login_new_user() for _ in range(2)]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/tasks/", json={"title": f"task {i}"}, headers={"Authorization": f"Bearer {users[i % 2][1]}"})
+                for i in range(20)
+            ))
+
+    try:
+        commits = db_commits_total.value("async")
+        responses = asyncio.run(run())
+        assert db_commits_total.value("async") - commits < 20
+        assert all(r.status_code == 200 for r in responses)
+        for i, r in enumerate(responses):
+            assert (r.json()["title"], r.json()["user_email"]) == (f"task {i}", users[i % 2][0])
+        assert len({r.json()["id"] for r in responses}) == 20
+        for _, token in users:
+            listing = asyncio.run(_get(f"/tasks/?page=1&limit=50&token={token}"))
+            assert listing["total"] == 10 and len(listing["items"]) == 10
+    finally:
+        for email, _ in users:
+            _cleanup_user(email)
+
+
+async def _get(url):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return (await client.get(url)).json()
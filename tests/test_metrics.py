@@ -0,0 +1,85 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.metrics import Histogram, db_pool_checkout_wait_seconds, db_pool_connect_seconds, db_pool_hold_seconds, http_requests_total, jwt_decode_seconds, password_hash_seconds
+from test_tasks import _cleanup_user, _login_new_user
+
+client = TestClient(app)
+
+
+def _samples(text: str) -> dict:
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_endpoint_reports_routes_auth_and_pools():
+    hashes = password_hash_seconds.count("hash_password")
+    email, token = _login_new_user()
+    try:
+        task_id = client.post(f"/tasks/?token={token}", json={"title": "x"}).json()["id"]
+        client.delete(f"/tasks/{task_id}?token={token}")
+        client.delete(f"/tasks/{task_id}?token={token}")
+
+        r = client.get("/metrics")
+        assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain; version=0.0.4")
+        samples = _samples(r.text)
+
+        # labelled by route template, not by concrete path
+        assert samples['http_requests_total{method="DELETE",route="/tasks/{task_id}",status="200"}'] >= 1
+        assert samples['http_requests_total{method="DELETE",route="/tasks/{task_id}",status="404"}'] >= 1
+        assert not any(f"/tasks/{task_id}" in name for name in samples)
+        assert samples['http_request_duration_seconds_count{method="POST",route="/auth/login"}'] >= 1
+
+        assert password_hash_seconds.count("hash_password") == hashes + 1
+        assert samples['password_hash_seconds_count{op="verify_password"}'] >= 1
+        assert 'password_hash_queue_seconds_count{op="verify_password"}' in samples
+        assert jwt_decode_seconds.count("miss") >= 1 and jwt_decode_seconds.count("hit") >= 1
+        assert samples['db_pool_checkout_wait_seconds_count{engine="async"}'] >= 1
+        assert samples['db_pool_hold_seconds_count{engine="async"}'] >= 1
+        assert 'db_pool_connect_seconds_count{engine="async"}' in samples
+        assert 'db_pool_checked_out{engine="async"}' in samples
+        assert "response_cache_hit_ratio" in samples and "token_cache_entries" in samples
+        assert samples['token_cache_lookups_total{result="hit"}'] >= 1
+        assert "# TYPE response_cache_lookups_total counter" in r.text
+    finally:
+        _cleanup_user(email)
+
+
+def test_pool_metrics_survive_dispose():
+    from sqlalchemy import text
+    from app.database import engine
+
+    engine.dispose()  # replaces the pool; its class and event listeners carry over
+    waits = db_pool_checkout_wait_seconds.count("sync")
+    connects, holds = db_pool_connect_seconds.count("sync"), db_pool_hold_seconds.count("sync")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert db_pool_checkout_wait_seconds.count("sync") == waits + 1
+    assert db_pool_connect_seconds.count("sync") == connects + 1
+    assert db_pool_hold_seconds.count("sync") == holds + 1
+
+
+def test_metrics_token(monkeypatch):
+    import app.routers.metrics as metrics_router
+
+    monkeypatch.setattr(metrics_router, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    r = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert r.status_code == 200 and "http_requests_total" in r.text
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("t_seconds", "test", ["op"], buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v, "a")
+    lines = h.render()
+    assert 't_seconds_bucket{op="a",le="0.1"} 2' in lines
+    assert 't_seconds_bucket{op="a",le="1.0"} 3' in lines
+    assert 't_seconds_bucket{op="a",le="+Inf"} 4' in lines
+    assert 't_seconds_count{op="a"} 4' in lines
+    assert http_requests_total.value("GET", "never", "200") == 0
@@ -0,0 +1,79 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.migrations import discover, migrate, status
+
+
+def _engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+
+
+def test_fresh_database_migrates_to_head_once(tmp_path):
+    engine = _engine(tmp_path)
+    applied = migrate(engine, log=lambda msg: None)
+    assert [m.version for m in applied] == [m.version for m in discover()]
+    assert all(done for _, done in status(engine))
+    assert {"users", "tasks", "refresh_tokens", "tasks_fts", "schema_version"} <= set(inspect(engine).get_table_names())
+    # already at head: nothing to do
+    assert migrate(engine, log=lambda msg: None) == []
+
+
+def test_target_stops_early(tmp_path):
+    engine = _engine(tmp_path)
+    assert [m.version for m in migrate(engine, target=2, log=lambda msg: None)] == [1, 2]
+    assert "refresh_tokens" not in inspect(engine).get_table_names()
+    assert [m.version for m in migrate(engine, log=lambda msg: None)][0] == 3
+
+
+def test_legacy_database_is_adopted_and_backfilled(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        # schema as created by the first releases, before migrations existed
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR NOT NULL UNIQUE, password VARCHAR NOT NULL)"))
+        conn.execute(text("CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, user_email VARCHAR REFERENCES users(email))"))
+        conn.execute(text("INSERT INTO users (email, password) VALUES ('old@example.com', 'x')"))
+        conn.execute(text("INSERT INTO tasks (title, user_email) VALUES ('legacy milk', 'old@example.com'), ('other', 'old@example.com')"))
+
+    migrate(engine, log=lambda msg: None)
+    with engine.connect() as conn:
+        assert "description" in [c["name"] for c in inspect(conn).get_columns("tasks")]
+        assert conn.execute(text("SELECT task_count, tasks_version FROM users")).one() == (2, 0)
+        hits = conn.execute(text("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH 'milk AND owner:1'")).scalars().all()
+        assert hits == [1]
+        # owner moved to an integer key
+        assert "user_email" not in [c["name"] for c in inspect(conn).get_columns("tasks")]
+        assert conn.execute(text("SELECT user_id FROM tasks ORDER BY id")).scalars().all() == [1, 1]
+        assert "ix_tasks_user_id_id" in [i["name"] for i in inspect(conn).get_indexes("tasks")]
+
+
+def test_owner_columns_stay_in_sync_between_expand_and_contract(tmp_path):
+    engine = _engine(tmp_path)
+    migrate(engine, target=5, log=lambda msg: None)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (email, password) VALUES ('a@example.com', 'x')"))
+        # a previous-release instance writes user_email, a new one user_id
+        conn.execute(text("INSERT INTO tasks (title, user_email) VALUES ('old writer', 'a@example.com')"))
+        conn.execute(text("INSERT INTO tasks (title, user_id) VALUES ('new writer', 1)"))
+        rows = conn.execute(text("SELECT title, user_id, user_email FROM tasks ORDER BY id")).all()
+        # both releases find both rows: the old one searches by hex(email), the new one by id
+        for owner in ("a@example.com".encode().hex().upper(), "1"):
+            match = f'writer AND owner:"{owner}"'
+            assert conn.execute(text("SELECT count(*) FROM tasks_fts WHERE tasks_fts MATCH :m"), {"m": match}).scalar() == 2
+    assert rows == [("old writer", 1, "a@example.com"), ("new writer", 1, "a@example.com")]
+    migrate(engine, log=lambda msg: None)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM tasks_fts WHERE tasks_fts MATCH 'writer AND owner:1'")).scalar() == 2
+
+
+def test_task_inserts_for_unknown_user_add_nothing_at_expand_step(tmp_path):
+    from app.routers.tasks import _insert_tasks
+
+    engine = _engine(tmp_path)
+    migrate(engine, target=5, log=lambda msg: None)  # tasks.user_id still nullable
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (email, password) VALUES ('a@example.com', 'x')"))
+        rows = [{"title": "one", "description": ""}, {"title": "two", "description": "d"}]
+        assert conn.execute(_insert_tasks("gone@example.com", rows)).all() == []
+        assert len(conn.execute(_insert_tasks("a@example.com", rows)).all()) == 2
+        assert conn.execute(text("SELECT title, user_id, user_email FROM tasks ORDER BY id")).all() == [
+            ("one", 1, "a@example.com"), ("two", 1, "a@example.com"),
+        ]
@@ -0,0 +1,48 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+import app.config as app_config
+import app.routers.tasks as tasks_router
+from app.main import app
+from app.utils.profiling import QueryBudgetExceeded, instrument_engine
+from test_tasks import _cleanup_user, _login_new_user
+
+client = TestClient(app)
+
+
+def test_server_timing_reports_queries_per_request():
+    email, token = _login_new_user()
+    try:
+        r = client.post(f"/tasks/?token={token}", json={"title": "a"})
+        assert r.headers["server-timing"].startswith("db;dur=") and r.headers["server-timing"].endswith('desc="2 queries"')
+        r = client.get("/tasks/", params={"token": token, "page": 1, "limit": 5})
+        assert r.headers["server-timing"].endswith('desc="2 queries"')
+    finally:
+        _cleanup_user(email)
+
+
+def test_query_budget_logs_or_fails_in_strict_mode(monkeypatch, caplog):
+    monkeypatch.setattr(tasks_router.list_tasks, "__query_budget__", 1)
+    email, token = _login_new_user()
+    try:
+        monkeypatch.setattr(app_config, "QUERY_BUDGET_STRICT", False)
+        with caplog.at_level(logging.WARNING, logger="app.sql"):
+            assert client.get("/tasks/", params={"token": token, "limit": 1}).status_code == 200
+        assert "GET /tasks/ ran 2 queries (budget 1)" in caplog.text
+
+        monkeypatch.setattr(app_config, "QUERY_BUDGET_STRICT", True)
+        with pytest.raises(QueryBudgetExceeded):
+            client.get("/tasks/", params={"token": token, "limit": 2})
+    finally:
+        _cleanup_user(email)
+
+
+def test_slow_query_log(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, slow_query_ms=0.000001)
+    with caplog.at_level(logging.WARNING, logger="app.sql"), engine.connect() as conn:
+        conn.execute(text("SELECT 42"))
+    assert "slow query" in caplog.text and "SELECT 42" in caplog.text
@@ -0,0 +1,46 @@
+import itertools
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import database
+from app.cache import MemoryCache, response_cache, write_marks
+from app.config import ASYNC_DATABASE_URL
+from app.main import app
+from test_tasks import _cleanup_user, _login_new_user
+
+client = TestClient(app)
+
+
+def test_listing_reads_replica_except_right_after_own_write(monkeypatch):
+    # a "replica" on the same database, so only the routing is under test
+    replica = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+    statements = []
+    event.listen(replica.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    monkeypatch.setattr(database, "ReplicaSessionLocals", [async_sessionmaker(replica, expire_on_commit=False)])
+    monkeypatch.setattr(database, "_next_replica", itertools.cycle([0]))
+    monkeypatch.setattr(write_marks, "backend", MemoryCache(1 << 20))
+    monkeypatch.setattr(write_marks, "enabled", True)
+    monkeypatch.setattr(response_cache, "backend", None)
+
+    email, token = _login_new_user()
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        assert client.get("/tasks/", headers=headers).json() == []
+        assert statements, "listing should have read from the replica"
+
+        statements.clear()
+        created = client.post("/tasks/", json={"title": "fresh"}, headers=headers).json()
+        # read-your-writes: the next listing comes from the primary
+        assert [t["id"] for t in client.get("/tasks/", headers=headers).json()] == [created["id"]]
+        assert client.get("/tasks/export", headers=headers).text.count("fresh") == 1
+        assert statements == []
+
+        # once the mark expires, reads go back to the replica
+        monkeypatch.setattr(write_marks, "backend", MemoryCache(1 << 20))
+        assert len(client.get("/tasks/", headers=headers).json()) == 1
+        assert statements
+    finally:
+        _cleanup_user(email)
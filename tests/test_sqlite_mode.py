@@ -0,0 +1,80 @@
+import asyncio
+import sqlite3
+
+from sqlalchemy import event, text
+
+from app import database
+
+
+def test_production_pragmas(tmp_path):
+    conn = sqlite3.connect(tmp_path / "prod.db")
+    database._sqlite_production_pragmas(conn, None)
+    pragma = lambda name: conn.execute(f"PRAGMA {name}").fetchone()[0]  # noqa: E731
+    assert pragma("journal_mode") == "wal"
+    assert pragma("synchronous") == 1  # NORMAL
+    assert pragma("busy_timeout") == database.SQLITE_BUSY_TIMEOUT_MS
+    conn.close()
+
+
+def test_write_transactions_are_serialized(monkeypatch):
+    monkeypatch.setattr(database, "SQLITE_PRODUCTION", True)
+    active, peak = 0, 0
+
+    async def writer(i):
+        nonlocal active, peak
+        async with database.AsyncWriteSessionLocal() as db:
+            await db.execute(text("SELECT 1"))  # BEGIN IMMEDIATE happens here
+            assert database._writer_lock().locked()
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            if i % 2:
+                await db.rollback()
+            else:
+                await db.commit()
+
+    async def readers_and_writers():
+        await asyncio.gather(*(writer(i) for i in range(4)))
+        # reads never take the writer lock
+        async with database.AsyncSessionLocal() as db:
+            assert (await db.execute(text("SELECT 1"))).scalar() == 1
+        return database._writer_lock().locked()
+
+    assert asyncio.run(readers_and_writers()) is False
+    assert peak == 1
+
+
+def test_writer_lock_is_released_after_the_transaction_ends(monkeypatch):
+    monkeypatch.setattr(database, "SQLITE_PRODUCTION", True)
+    sync_engine = database.async_engine.sync_engine
+    with database.engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE IF NOT EXISTS writer_lock_check (n INTEGER)")
+
+    def no_busy_wait(conn):
+        # a BEGIN IMMEDIATE racing a commit fails at once instead of waiting
+        conn.connection.dbapi_connection.cursor().execute("PRAGMA busy_timeout = 0")
+
+    async def writer(i):
+        async with database.AsyncWriteSessionLocal() as db:
+            await db.execute(text("INSERT INTO writer_lock_check VALUES (:n)"), {"n": i})
+            if i % 3 == 2:
+                await db.rollback()
+            else:
+                await db.commit()
+
+    async def overlapping_writers():
+        try:
+            await asyncio.gather(*(writer(i) for i in range(30)))
+        finally:
+            await database.async_engine.dispose()
+        return database._writer_lock().locked()
+
+    event.listen(sync_engine, "engine_connect", no_busy_wait)
+    try:
+        assert asyncio.run(overlapping_writers()) is False
+    finally:
+        event.remove(sync_engine, "engine_connect", no_busy_wait)
+        with database.engine.begin() as conn:
+            assert conn.exec_driver_sql("SELECT count(*) FROM writer_lock_check").scalar() == 20
+            conn.exec_driver_sql("DROP TABLE writer_lock_check")
@@ -0,0 +1,60 @@
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+
+from app.build_frontend import build
+from app.main import app
+from app.utils.static import IMMUTABLE, PrecompressedStaticFiles, accepted_encodings
+from test_tasks import _cleanup_user, _login_new_user
+
+client = TestClient(app)
+
+
+def test_build_hashes_assets_and_precompresses(tmp_path):
+    report = build("app/frontend", str(tmp_path))
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    css = manifest["style.css"]
+    assert css.startswith("style.") and css.endswith(".css") and (tmp_path / css).exists()
+    html = (tmp_path / "notes.html").read_text()
+    assert f'href="/{css}"' in html and f'src="/{manifest["shared.js"]}"' in html
+    assert gzip.decompress((tmp_path / f"{css}.gz").read_bytes()) == (tmp_path / css).read_bytes()
+    assert report[css]["gzip"] < report[css]["identity"]
+
+
+def test_precompressed_variants_by_accept_encoding(tmp_path):
+    build("app/frontend", str(tmp_path))
+    css = json.loads((tmp_path / "manifest.json").read_text())["style.css"]
+    static = TestClient(Starlette())
+    static.app.mount("/", PrecompressedStaticFiles(directory=str(tmp_path), html=True))
+
+    r = static.get(f"/{css}", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip" and r.headers["content-type"].startswith("text/css")
+    assert r.headers["cache-control"] == IMMUTABLE and r.headers["vary"] == "Accept-Encoding"
+    assert r.content == (tmp_path / css).read_bytes()  # decoded by the client
+
+    r = static.get(f"/{css}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers and r.content == (tmp_path / css).read_bytes()
+
+    r = static.get("/notes.html", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip" and r.headers["cache-control"] == "no-cache"
+    again = static.get("/notes.html", headers={"Accept-Encoding": "gzip", "If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br;q=0") == ["gzip", "deflate"]
+    assert accepted_encodings("br;q=0.5,gzip;q=1.0") == ["br", "gzip"]
+
+
+def test_large_listing_is_gzipped_small_one_is_not():
+    email, token = _login_new_user()
+    try:
+        client.post(f"/tasks/bulk?token={token}", json=[{"title": f"task {i}", "description": "x" * 50} for i in range(50)])
+        big = client.get("/tasks/", params={"token": token, "page": 1, "limit": 50}, headers={"Accept-Encoding": "gzip"})
+        assert big.headers["content-encoding"] == "gzip" and len(big.json()["items"]) == 50
+        small = client.get("/tasks/", params={"token": token, "page": 1, "limit": 1}, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+    finally:
+        _cleanup_user(email)
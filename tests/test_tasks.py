@@ -0,0 +1,404 @@
+import asyncio
+import uuid
+
+import httpx
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal, Base, engine
+from app.models.user import User
+from app.models.task import Task
+from app.utils.importer import iter_records
+
+client = TestClient(app)
+
+
+def _cleanup_user(email: str):
+    db = SessionLocal()
+    try:
+        u = db.query(User).filter(User.email == email).first()
+        if u:
+            db.query(Task).filter(Task.user_email == email).delete()
+            db.delete(u)
+            db.commit()
+    finally:
+        db.close()
+
+
+def _login_new_user():
+    Base.metadata.create_all(bind=engine)
+    email = f"test_{uuid.uuid4().hex}@example.com"
+    r = client.post("/auth/register", json={"email": email, "password": "pw"})
+    assert r.status_code == 200
+    r = client.post("/auth/login", json={"email": email, "password": "pw"})
+    return email, r.json()["token"]
+
+
+def test_cursor_pagination_walks_all_tasks():
+    email, token = _login_new_user()
+    try:
+        ids = []
+        for i in range(7):
+            r = client.post(f"/tasks/?token={token}", json={"title": f"task {i}"})
+            ids.append(r.json()["id"])
+
+        seen = []
+        cursor = ""
+        while True:
+            r = client.get("/tasks/", params={"token": token, "limit": 3, "cursor": cursor})
+            assert r.status_code == 200
+            data = r.json()
+            assert set(data) == {"items", "limit", "next_cursor"}
+            seen.extend(t["id"] for t in data["items"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == ids
+    finally:
+        _cleanup_user(email)
+
+
+def test_cursor_pagination_with_search_and_offset_handoff():
+    email, token = _login_new_user()
+    try:
+        for i in range(5):
+            client.post(f"/tasks/?token={token}", json={"title": f"alpha {i}"})
+            client.post(f"/tasks/?token={token}", json={"title": f"beta {i}"})
+
+        # offset page hands out a cursor for the next page
+        r = client.get("/tasks/", params={"token": token, "page": 1, "limit": 4})
+        data = r.json()
+        assert data["total"] == 10 and data["pages"] == 3
+        assert data["next_cursor"]
+        r = client.get("/tasks/", params={"token": token, "limit": 2, "cursor": data["next_cursor"]})
+        assert [t["title"] for t in r.json()["items"]] == ["alpha 2", "beta 2"]
+
+        # cursor pages combine with the search filter
+        r = client.get("/tasks/", params={"token": token, "q": "alpha", "limit": 2, "cursor": ""})
+        data = r.json()
+        assert [t["title"] for t in data["items"]] == ["alpha 0", "alpha 1"]
+        r = client.get("/tasks/", params={"token": token, "q": "alpha", "limit": 2, "cursor": data["next_cursor"]})
+        assert [t["title"] for t in r.json()["items"]] == ["alpha 2", "alpha 3"]
+    finally:
+        _cleanup_user(email)
+
+
+def test_invalid_cursor_is_rejected():
+    email, token = _login_new_user()
+    try:
+        r = client.get("/tasks/", params={"token": token, "cursor": "not-a-cursor"})
+        assert r.status_code == 400
+    finally:
+        _cleanup_user(email)
+
+
+def test_search_matches_description_and_ranks_title_hits_first():
+    email, token = _login_new_user()
+    try:
+        client.post(f"/tasks/?token={token}", json={"title": "groceries", "description": "buy milk and bread"})
+        client.post(f"/tasks/?token={token}", json={"title": "milk the budget", "description": "finance"})
+        client.post(f"/tasks/?token={token}", json={"title": "unrelated", "description": "nothing here"})
+
+        r = client.get("/tasks/", params={"token": token, "q": "milk"})
+        assert r.status_code == 200
+        titles = [t["title"] for t in r.json()]
+        assert titles == ["milk the budget", "groceries"]
+
+        # prefix match on every term
+        r = client.get("/tasks/", params={"token": token, "q": "bre mil"})
+        assert [t["title"] for t in r.json()] == ["groceries"]
+
+        # deleted tasks drop out of the index
+        gid = client.get("/tasks/", params={"token": token, "q": "groceries"}).json()[0]["id"]
+        client.delete(f"/tasks/{gid}?token={token}")
+        r = client.get("/tasks/", params={"token": token, "q": "bread"})
+        assert r.json() == []
+    finally:
+        _cleanup_user(email)
+
+
+def test_search_runs_the_full_text_query_once():
+    from sqlalchemy import select
+    from app.utils.search import apply_search
+
+    query, _ = apply_search(select(Task.id).where(Task.user_id == 1), "milk", 1, "sqlite")
+    with engine.connect() as conn:
+        compiled = query.compile(conn)
+        params = compiled.construct_params()
+        plan = [row[3] for row in conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + str(compiled), tuple(params[k] for k in compiled.positiontup)
+        )]
+    # the MATCH runs once up front, not once per task of the user
+    assert "MATERIALIZE fts" in plan
+
+
+def test_bulk_create_and_delete_report_per_item_results():
+    email, token = _login_new_user()
+    other, other_token = _login_new_user()
+    try:
+        r = client.post(f"/tasks/bulk?token={token}", json=[
+            {"title": "one"}, {"title": "  "}, {"title": "three", "description": "d"}, {"nope": 1},
+        ])
+        assert r.status_code == 200
+        data = r.json()
+        assert data["created"] == 2 and data["failed"] == 2
+        assert [res["status"] for res in data["results"]] == [201, 422, 201, 422]
+        assert data["results"][2]["task"]["description"] == "d"
+        ids = [res["task"]["id"] for res in data["results"] if res["status"] == 201]
+        assert [t["id"] for t in client.get(f"/tasks/?token={token}").json()] == ids
+
+        foreign = client.post(f"/tasks/?token={other_token}", json={"title": "theirs"}).json()["id"]
+        r = client.request("DELETE", f"/tasks/bulk?token={token}", json=[ids[0], foreign, 999999, ids[0]])
+        assert r.status_code == 200
+        data = r.json()
+        assert data["deleted"] == 1
+        # one result per input id, in order; the repeat finds it already gone
+        assert [(res["id"], res["status"]) for res in data["results"]] == [
+            (ids[0], 200), (foreign, 403), (999999, 404), (ids[0], 404),
+        ]
+        assert data["results"][3]["error"] == "Task already deleted"
+        assert [t["id"] for t in client.get(f"/tasks/?token={token}").json()] == ids[1:]
+    finally:
+        _cleanup_user(email)
+        _cleanup_user(other)
+
+
+def test_writes_for_deleted_user_are_rejected():
+    email, token = _login_new_user()
+    _cleanup_user(email)  # the token stays valid until it expires
+    r = client.post(f"/tasks/?token={token}", json={"title": "orphan"})
+    assert r.status_code == 401 and r.json()["detail"] == "Invalid token: unknown user"
+    assert client.post(f"/tasks/bulk?token={token}", json=[{"title": "orphan"}]).status_code == 401
+    assert client.post(f"/tasks/import?token={token}", content=b'{"title": "orphan"}').status_code == 401
+
+
+def test_bulk_size_cap(monkeypatch):
+    import app.routers.tasks as tasks_router
+
+    email, token = _login_new_user()
+    try:
+        monkeypatch.setattr(tasks_router, "BULK_MAX_ITEMS", 2)
+        r = client.post(f"/tasks/bulk?token={token}", json=[{"title": "a"}, {"title": "b"}, {"title": "c"}])
+        assert r.status_code == 413
+    finally:
+        _cleanup_user(email)
+
+
+def test_export_streams_ndjson_and_csv():
+    import csv
+    import io
+    import json
+
+    email, token = _login_new_user()
+    try:
+        client.post(f"/tasks/bulk?token={token}", json=[
+            {"title": "plain"}, {"title": "with, comma", "description": 'multi\nline "quoted"'}, {"title": "other"},
+        ])
+
+        r = client.get(f"/tasks/export?token={token}")
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in r.text.splitlines()]
+        assert [t["title"] for t in rows] == ["plain", "with, comma", "other"]
+        assert rows[1]["description"] == 'multi\nline "quoted"'
+
+        r = client.get(f"/tasks/export?token={token}&format=csv&q=comma")
+        assert r.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(r.text)))
+        assert [(t["title"], t["description"]) for t in rows] == [("with, comma", 'multi\nline "quoted"')]
+
+        assert client.get(f"/tasks/export?token={token}&format=xml").status_code == 422
+    finally:
+        _cleanup_user(email)
+
+
+def test_import_ndjson_and_csv_in_batches(monkeypatch):
+    import app.routers.tasks as tasks_router
+
+    email, token = _login_new_user()
+    try:
+        monkeypatch.setattr(tasks_router, "IMPORT_BATCH_SIZE", 2)
+        body = "\n".join([
+            '{"title": "one"}',
+            '{"title": "two", "description": "d"}',
+            "",
+            "not json",
+            '{"title": "   "}',
+            '["not", "an", "object"]',
+            '{"title": "three"}',
+        ])
+        r = client.post(f"/tasks/import?token={token}", content=body.encode("utf-8"))
+        assert r.status_code == 200
+        data = r.json()
+        assert (data["rows"], data["imported"], data["failed"]) == (6, 3, 3)
+        assert [e["row"] for e in data["errors"]] == [3, 4, 5]
+
+        csv_body = 'title,description\r\nfour,"multi\nline, with comma"\r\n"",empty\r\nfive,\r\n'
+        r = client.post(f"/tasks/import?token={token}", content=csv_body.encode("utf-8"), headers={"Content-Type": "text/csv"})
+        data = r.json()
+        assert (data["rows"], data["imported"], data["failed"]) == (3, 2, 1)
+
+        tasks = client.get(f"/tasks/?token={token}").json()
+        assert [t["title"] for t in tasks] == ["one", "two", "three", "four", "five"]
+        assert tasks[3]["description"] == "multi\nline, with comma"
+
+        r = client.post(f"/tasks/import?token={token}&format=csv", content=b"name\nx\n")
+        assert r.status_code == 400
+        assert client.get(f"/tasks/import/progress?token={token}").json() == {"running": False}
+    finally:
+        _cleanup_user(email)
+
+
+def test_import_csv_stray_quote_and_record_cap(monkeypatch):
+    import app.routers.tasks as tasks_router
+
+    email, token = _login_new_user()
+    try:
+        # a quote inside an unquoted field is a literal, not the start of a quoted field
+        body = 'title,description\nBuy 27" monitor,x\nsix,"say ""hi""\nthere"\nseven,\n'
+        r = client.post(f"/tasks/import?token={token}&format=csv", content=body.encode("utf-8"))
+        data = r.json()
+        assert (data["rows"], data["imported"], data["failed"]) == (3, 3, 0)
+        tasks = client.get(f"/tasks/?token={token}").json()
+        assert [t["title"] for t in tasks] == ['Buy 27" monitor', "six", "seven"]
+        assert tasks[1]["description"] == 'say "hi"\nthere'
+
+        monkeypatch.setattr(tasks_router, "IMPORT_MAX_RECORD_SIZE", 40)
+        body = 'title\n"never closed\n' + "x" * 10 + "\n" + "x" * 10 + "\n" + "x" * 10 + "\neight\n"
+        data = client.post(f"/tasks/import?token={token}&format=csv", content=body.encode("utf-8")).json()
+        assert (data["imported"], data["failed"]) == (1, 1)
+        assert "longer than 40" in data["errors"][0]["error"]
+
+        # an overlong line is a row error, even when it arrives over several chunks
+        data = client.post(f"/tasks/import?token={token}&format=csv", content=b"title\n" + b"x" * 100 + b"\nnine\n").json()
+        assert (data["rows"], data["imported"], data["failed"]) == (2, 1, 1)
+        assert data["errors"] == [{"row": 1, "error": "line longer than 40 characters"}]
+
+        async def chunks():
+            for chunk in (b"title\nten\n", b"y" * 30, b"y" * 30, b"y\neleven"):
+                yield chunk
+
+        async def records():
+            return [r async for r in iter_records(chunks(), "csv", 40)]
+
+        assert asyncio.run(records()) == [(1, {"title": "ten"}), (2, "line longer than 40 characters"), (3, {"title": "eleven"})]
+    finally:
+        _cleanup_user(email)
+
+
+def test_import_fatal_error_reports_committed_progress(monkeypatch):
+    import app.routers.tasks as tasks_router
+
+    email, token = _login_new_user()
+    try:
+        monkeypatch.setattr(tasks_router, "IMPORT_BATCH_SIZE", 2)
+        # the bad byte arrives after two batches have been committed
+        body = [b"".join(b'{"title": "t%d"}\n' % i for i in range(5)), b'{"title": "\xff"}\n']
+
+        async def post():
+            async def content():
+                for chunk in body:
+                    yield chunk
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+                return await ac.post(f"/tasks/import?token={token}", content=content())
+
+        r = asyncio.run(post())
+        assert r.status_code == 400
+        detail = r.json()["detail"]
+        assert "utf-8" in detail["error"] and (detail["rows"], detail["imported"]) == (5, 4)
+        assert len(client.get(f"/tasks/?token={token}").json()) == 4
+    finally:
+        _cleanup_user(email)
+
+
+def test_page_totals_come_from_maintained_counter():
+    email, token = _login_new_user()
+    try:
+        def page(**params):
+            return client.get("/tasks/", params={"token": token, "page": 1, "limit": 2, **params}).json()
+
+        first = client.post(f"/tasks/?token={token}", json={"title": "single"}).json()["id"]
+        bulk = client.post(f"/tasks/bulk?token={token}", json=[{"title": "b1"}, {"title": "b2"}, {"title": ""}]).json()
+        client.post(f"/tasks/import?token={token}", content=b'{"title": "i1"}\n{"title": "i2"}\n')
+        assert page()["total"] == 5
+
+        client.delete(f"/tasks/{first}?token={token}")
+        client.request("DELETE", f"/tasks/bulk?token={token}", json=[bulk["results"][0]["task"]["id"], 999999])
+        data = page()
+        assert (data["total"], data["pages"], data["has_next"]) == (3, 2, True)
+
+        # with a search the total is still an exact count of matches
+        assert page(q="b2")["total"] == 1
+
+        data = page(page=2, include_total="false")
+        assert data["total"] is None and data["pages"] is None
+        assert [t["title"] for t in data["items"]] == ["i2"] and data["has_next"] is False
+    finally:
+        _cleanup_user(email)
+
+
+def test_list_etag_and_conditional_get():
+    email, token = _login_new_user()
+    try:
+        client.post(f"/tasks/?token={token}", json={"title": "first"})
+        params = {"token": token, "page": 1, "limit": 5}
+        r = client.get("/tasks/", params=params)
+        etag = r.headers["etag"]
+        assert r.status_code == 200 and etag
+
+        r = client.get("/tasks/", params=params, headers={"If-None-Match": etag})
+        assert r.status_code == 304 and r.headers["etag"] == etag and not r.content
+
+        # other parameters are a different representation
+        other = client.get("/tasks/", params={**params, "limit": 6})
+        assert other.headers["etag"] != etag
+
+        # any write bumps the version
+        client.post(f"/tasks/?token={token}", json={"title": "second"})
+        r = client.get("/tasks/", params=params, headers={"If-None-Match": etag})
+        assert r.status_code == 200 and r.headers["etag"] != etag
+        assert r.json()["total"] == 2
+    finally:
+        _cleanup_user(email)
+
+
+def test_listing_json_matches_stdlib_encoding(monkeypatch):
+    import json
+    import app.utils.serialization as serialization
+
+    email, token = _login_new_user()
+    try:
+        client.post(f"/tasks/?token={token}", json={"title": "ñandú \"quoted\" ✓", "description": None})
+        r = client.get(f"/tasks/?token={token}")
+        assert r.headers["content-type"] == "application/json"
+        tasks = r.json()
+        assert [(t["title"], t["description"], t["user_email"]) for t in tasks] == [("ñandú \"quoted\" ✓", "", email)]
+
+        # the stdlib fallback encodes byte-for-byte the same
+        fast = serialization.dumps(tasks)
+        monkeypatch.setattr(serialization, "orjson", None)
+        assert serialization.dumps(tasks) == fast == r.content
+        assert json.loads(fast) == tasks
+    finally:
+        _cleanup_user(email)
+
+
+def test_fields_projection_on_list_and_export():
+    email, token = _login_new_user()
+    try:
+        client.post(f"/tasks/bulk?token={token}", json=[{"title": "a", "description": "long " * 100}, {"title": "b"}])
+
+        tasks = client.get("/tasks/", params={"token": token, "fields": "title"}).json()
+        assert [(sorted(t), t["title"]) for t in tasks] == [(["id", "title"], "a"), (["id", "title"], "b")]
+        data = client.get("/tasks/", params={"token": token, "fields": "title,id", "limit": 1, "cursor": ""}).json()
+        assert set(data["items"][0]) == {"id", "title"} and data["next_cursor"]
+        data = client.get("/tasks/", params={"token": token, "fields": "description", "page": 1, "limit": 5, "q": "long"}).json()
+        assert [set(t) for t in data["items"]] == [{"id", "description"}] and data["total"] == 1
+
+        r = client.get("/tasks/", params={"token": token, "fields": "title,password"})
+        assert r.status_code == 400 and "password" in r.json()["detail"]
+
+        lines = client.get(f"/tasks/export?token={token}&format=csv&fields=title").text.splitlines()
+        assert lines[0] == "id,title" and [line.split(",")[1] for line in lines[1:]] == ["a", "b"]
+        assert client.get(f"/tasks/export?token={token}&fields=nope").status_code == 400
+    finally:
+        _cleanup_user(email)
@@ -0,0 +1,114 @@
+"""Compression benchmark: bytes on the wire and latency, before vs. after.
+
+Runs two real uvicorn servers on the same seeded database:
+  before  plain sources, no response compression (COMPRESS_MIN_BYTES=0)
+  after   the app.build_frontend build (hashed, .gz/.br) + gzip for large responses
+and reports, with a browser-like Accept-Encoding:
+  - first and repeat view of notes.html and its assets (requests and bytes;
+    immutable assets are not requested again)
+  - GET /tasks/ pages of 10/100/1000 rows: bytes, mean latency over loopback
+    and the estimated time on a --mbps link (latency + bytes / bandwidth)
+
+    python tools/bench_compression.py
+    python tools/bench_compression.py --mbps 2 --repeat 100
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# ensure project root is on sys.path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import httpx
+
+from bench_api import seed, start_server
+
+ACCEPT = "gzip, deflate, br"
+_ASSETS = re.compile(r'(?:src|href)="(/[^"]+\.(?:css|js|svg))"')
+
+
+def page_views(base: str):
+    """(requests, bytes) of a first and a repeat view of notes.html."""
+    with httpx.Client(base_url=base, headers={"Accept-Encoding": ACCEPT}) as client:
+        html = client.get("/notes.html")
+        paths = ["/notes.html", *_ASSETS.findall(html.text)]
+        first = [client.get(p) for p in paths]
+        repeat_requests = repeat_bytes = 0
+        for r in first:
+            if "immutable" in r.headers.get("cache-control", ""):
+                continue  # served from the browser cache
+            again = client.get(str(r.url.path), headers={"If-None-Match": r.headers.get("etag", "")})
+            repeat_requests += 1
+            repeat_bytes += again.num_bytes_downloaded
+    return (len(first), sum(r.num_bytes_downloaded for r in first)), (repeat_requests, repeat_bytes)
+
+
+def listing(base: str, token: str, limit: int, repeat: int):
+    """(wire bytes, mean ms) of GET /tasks/?page=1&limit=..."""
+    headers = {"Accept-Encoding": ACCEPT, "Authorization": f"Bearer {token}"}
+    params = {"page": 1, "limit": limit}
+    with httpx.Client(base_url=base, headers=headers) as client:
+        client.get("/tasks/", params=params)  # warm up
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            r = client.get("/tasks/", params=params)
+            r.raise_for_status()
+        elapsed = (time.perf_counter() - t0) / repeat * 1000
+    return r.num_bytes_downloaded, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", help="sync SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--limits", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--mbps", type=float, default=10, help="link speed for the transfer estimate")
+    args = parser.parse_args()
+
+    from app.build_frontend import build
+    from app.utils.auth import create_token
+
+    tmp = None
+    db_url = args.db_url
+    if not db_url:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        db_url = f"sqlite:///{tmp.name}"
+    build_dir = tempfile.mkdtemp(prefix="frontend_build_")
+    try:
+        emails, _ = seed(db_url, 1, args.tasks, 10)
+        token = create_token({"sub": emails[0]})
+        build(str(ROOT / "app" / "frontend"), build_dir)
+        modes = {
+            "before": {"COMPRESS_MIN_BYTES": "0", "FRONTEND_BUILD_DIR": os.path.join(build_dir, "missing")},
+            "after": {"FRONTEND_BUILD_DIR": build_dir},
+        }
+        ms_per_byte = 8 / (args.mbps * 1e6) * 1000
+        print(f"{db_url.split(':', 1)[0]}, Accept-Encoding: {ACCEPT}, transfer estimate at {args.mbps:g} Mbit/s\n")
+        print(f"{'mode':7} {'what':22} {'requests':>8} {'bytes':>9} {'ms':>8} {'est. ms':>8}")
+        for mode, env in modes.items():
+            proc, base = start_server(db_url, 1, env)
+            try:
+                (n1, b1), (n2, b2) = page_views(base)
+                print(f"{mode:7} {'notes.html first view':22} {n1:8} {b1:9} {'':>8} {b1 * ms_per_byte:8.2f}")
+                print(f"{mode:7} {'notes.html repeat view':22} {n2:8} {b2:9} {'':>8} {b2 * ms_per_byte:8.2f}")
+                for limit in args.limits:
+                    size, ms = listing(base, token, limit, args.repeat)
+                    what = f"GET /tasks/ {limit} rows"
+                    print(f"{mode:7} {what:22} {1:8} {size:9} {ms:8.2f} {ms + size * ms_per_byte:8.2f}")
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+    finally:
+        if tmp:
+            tmp.close()
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Measure task search latency: indexed full-text search vs. the old ILIKE scan.
+
+Seeds a throwaway database with N tasks (default 1M) spread over a few users
+and times `q` lookups through app.utils.search.apply_search.
+
+    python tools/bench_search.py --rows 1000000
+    python tools/bench_search.py --url postgresql+psycopg://... --rows 1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# ensure project root is on sys.path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.user import User
+from app.models.task import Task
+from app.utils.search import apply_search
+
+SYLLABLES = "ka lo mi ne ru ta vi so pe da fu ri no ze ba lu xo ge".split()
+
+
+def make_vocabulary(size: int, rnd: random.Random):
+    """Synthetic words with Zipf-like frequencies, like real note text."""
+    words = sorted({"".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))) for _ in range(size * 2)})[:size]
+    rnd.shuffle(words)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    return words, cum_weights
+
+
+def seed(engine, rows: int, users: int, batch: int = 10000):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    emails = [f"bench_{i}@example.com" for i in range(users)]
+    rnd = random.Random(42)
+    words, cum_weights = make_vocabulary(20000, rnd)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"email": e, "password": "x"} for e in emails])
+        user_ids = conn.scalars(select(User.id).order_by(User.id)).all()
+        for start in range(0, rows, batch):
+            n = min(batch, rows - start)
+            conn.execute(insert(Task), [
+                {
+                    "title": " ".join(rnd.choices(words, cum_weights=cum_weights, k=3)),
+                    "description": " ".join(rnd.choices(words, cum_weights=cum_weights, k=12)),
+                    "user_id": user_ids[(start + i) % users],
+                }
+                for i in range(n)
+            ])
+    return user_ids, words
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="database URL (default: temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = None
+    url = args.url
+    if not url:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        url = f"sqlite:///{tmp.name}"
+    engine = create_engine(url)
+    try:
+        t0 = time.perf_counter()
+        user_ids, words = seed(engine, args.rows, args.users)
+        print(f"seeded {args.rows} tasks for {args.users} users in {time.perf_counter() - t0:.1f}s ({engine.dialect.name})")
+
+        user = user_ids[0]
+        dialect = engine.dialect.name
+        with Session(engine) as db:
+            base = db.query(Task).filter(Task.user_id == user)
+            # common, mid-frequency, rare, two-term and prefix queries, plus a miss
+            queries = [words[0], words[100], words[5000], f"{words[3]} {words[40]}", words[200][:3], "qqqq"]
+            for q in queries:
+                def indexed():
+                    query, _ = apply_search(base, q, user, dialect)
+                    query.limit(args.limit).all()
+
+                def scan():
+                    base.filter(Task.title.ilike(f"%{q}%")).order_by(Task.id).limit(args.limit).all()
+
+                p50, p95 = timed(indexed, args.repeat)
+                s50, s95 = timed(scan, args.repeat)
+                print(f"q={q!r:24} indexed p50={p50:8.2f}ms p95={p95:8.2f}ms | ilike p50={s50:8.2f}ms p95={s95:8.2f}ms")
+    finally:
+        engine.dispose()
+        if tmp:
+            tmp.close()
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare the GET /tasks serialization paths: ORM entities + jsonable_encoder
+(the old path) vs. column tuples + app.utils.serialization.dumps.
+
+Times query + encode, and encode alone, for pages of 10, 100 and 10k rows
+on a throwaway SQLite database.
+
+    python tools/bench_serialization.py
+    python tools/bench_serialization.py --sizes 10 100 10000 --repeat 50
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# ensure project root is on sys.path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models.user import User
+from app.models.task import Task
+from app.routers.tasks import _row_dicts, _select_columns
+from app.utils.serialization import dumps, orjson
+
+EMAIL = "bench@example.com"
+
+
+def old_encode(tasks) -> bytes:
+    # what FastAPI's JSONResponse did with the returned ORM objects
+    return json.dumps(jsonable_encoder(tasks), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def new_encode(rows) -> bytes:
+    return dumps(_row_dicts(rows, rows[0]._fields if rows else ()))
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(int(len(samples) * 0.95) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 10000])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    engine = create_engine(f"sqlite:///{tmp.name}")
+    try:
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            user_id = conn.scalar(insert(User).returning(User.id), [{"email": EMAIL, "password": "x"}])
+            conn.execute(insert(Task), [
+                {"title": f"task {i} ñandú", "description": f"description of task number {i}", "user_id": user_id}
+                for i in range(max(args.sizes))
+            ])
+        print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json (orjson not installed)'}")
+
+        with Session(engine) as db:
+            for n in args.sizes:
+                old_query = select(Task).where(Task.user_id == user_id).order_by(Task.id).limit(n)
+                new_query = select(*_select_columns(None, EMAIL)).where(Task.user_id == user_id).order_by(Task.id).limit(n)
+
+                def old_path():
+                    db.expunge_all()  # each request starts with an empty identity map
+                    return old_encode(db.scalars(old_query).all())
+
+                def new_path():
+                    return new_encode(db.execute(new_query).all())
+
+                # the ORM objects also carry the user_id key, which listings never returned
+                assert [{k: v for k, v in t.items() if k != "user_id"} for t in json.loads(old_path())] == json.loads(new_path())
+                tasks, rows = db.scalars(old_query).all(), db.execute(new_query).all()
+                results = {
+                    "old query+encode": timed(old_path, args.repeat),
+                    "new query+encode": timed(new_path, args.repeat),
+                    "old encode": timed(lambda: old_encode(tasks), args.repeat),
+                    "new encode": timed(lambda: new_encode(rows), args.repeat),
+                }
+                speedup = results["old query+encode"][0] / results["new query+encode"][0]
+                print(f"\n{n} rows (end-to-end {speedup:.1f}x faster)")
+                for label, (p50, p95) in results.items():
+                    print(f"  {label:17} p50={p50:9.3f}ms p95={p95:9.3f}ms")
+    finally:
+        engine.dispose()
+        tmp.close()
+        os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
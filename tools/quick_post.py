@@ -8,12 +8,18 @@ sys.path.insert(0, str(ROOT))
 from fastapi.testclient import TestClient
 from app.main import app
 
-client = TestClient(app)
-email = "quick_test_user@example.com"
-password = "correct_horse_battery_staple"
-r = client.post("/auth/register", json={"email": email, "password": password})
-print('status', r.status_code)
-try:
-    print('json:', r.json())
-except Exception:
-    print('text:', r.text)
+def main():
+    client = TestClient(app)
+    email = "quick_test_user@example.com"
+    password = "correct_horse_battery_staple"
+    r = client.post("/auth/register", json={"email": email, "password": password})
+    print('status', r.status_code)
+    try:
+        print('json:', r.json())
+    except Exception:
+        print('text:', r.text)
+
+
+# guard: password-hashing worker processes re-import the main module
+if __name__ == "__main__":
+    main()